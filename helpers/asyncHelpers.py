@@ -0,0 +1,125 @@
+import asyncio
+from functools import wraps
+
+from helpers.logHelpers import createLog
+
+logger = createLog('asyncHelpers')
+
+DEFAULT_CONCURRENCY = 100
+
+# Seconds held back from the invocation deadline so that a timed out handler
+# can still log and return before Lambda kills the invocation
+DEFAULT_MARGIN = 0.5
+
+# The loop and semaphore are kept at module level so that the loop, and any
+# connection pools bound to it, survive across warm invocations
+state = {
+    'loop': None,
+    'semaphore': None,
+    'maxConcurrency': DEFAULT_CONCURRENCY
+}
+
+
+def getLoop():
+    """Returns the persistent event loop, creating it on the first call or if
+    it has been closed.
+
+    Returns:
+        asyncio.AbstractEventLoop -- The event loop used for all invocations
+    """
+    if state['loop'] is None or state['loop'].is_closed():
+        state['loop'] = asyncio.new_event_loop()
+        state['semaphore'] = None
+        asyncio.set_event_loop(state['loop'])
+
+    return state['loop']
+
+
+def remainingTime(context, margin):
+    """Calculates the time left in the current invocation in seconds.
+
+    Arguments:
+        context {LambdaContext} -- The invocation context, may be None locally
+        margin {float} -- Seconds to hold back from the deadline
+
+    Returns:
+        float|None -- The remaining time, or None if there is no deadline
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+
+    return max(context.get_remaining_time_in_millis() / 1000 - margin, 0)
+
+
+async def bounded(coro):
+    """Awaits a coroutine once a slot is available under the handler's
+    maxConcurrency limit.
+
+    Arguments:
+        coro {coroutine} -- The coroutine to run
+
+    Returns:
+        object -- The result of the coroutine
+    """
+    if state['semaphore'] is None:
+        state['semaphore'] = asyncio.Semaphore(state['maxConcurrency'])
+
+    async with state['semaphore']:
+        return await coro
+
+
+async def gatherBounded(*coros, returnExceptions=False):
+    """Runs coroutines concurrently, with no more than the handler's
+    maxConcurrency in flight at once.
+
+    Arguments:
+        *coros {coroutine} -- The coroutines to run
+
+    Keyword Arguments:
+        returnExceptions {bool} -- Return exceptions as results rather than
+        raising the first one (default: {False})
+
+    Returns:
+        list -- The results, in the order the coroutines were passed
+    """
+    return await asyncio.gather(
+        *(bounded(coro) for coro in coros),
+        return_exceptions=returnExceptions
+    )
+
+
+def asyncHandler(maxConcurrency=DEFAULT_CONCURRENCY, margin=DEFAULT_MARGIN):
+    """Adapts an `async def` handler to the synchronous interface expected by
+    Lambda. All invocations run on one persistent event loop and the handler
+    is cancelled if it has not completed by the invocation deadline.
+
+    Keyword Arguments:
+        maxConcurrency {int} -- The limit on coroutines run through bounded or
+        gatherBounded at once (default: {DEFAULT_CONCURRENCY})
+        margin {float} -- Seconds held back from the invocation deadline
+        (default: {DEFAULT_MARGIN})
+
+    Raises:
+        asyncio.TimeoutError: The handler did not complete before the deadline
+
+    Returns:
+        function -- A decorator for the async handler
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(event, context):
+            loop = getLoop()
+            if state['maxConcurrency'] != maxConcurrency:
+                state['maxConcurrency'] = maxConcurrency
+                state['semaphore'] = None
+
+            timeout = remainingTime(context, margin)
+            try:
+                return loop.run_until_complete(
+                    asyncio.wait_for(func(event, context), timeout)
+                )
+            except asyncio.TimeoutError as err:
+                logger.error('Handler cancelled at invocation deadline')
+                raise err
+        return wrapper
+    return decorator
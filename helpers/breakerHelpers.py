@@ -0,0 +1,352 @@
+from collections import deque
+from threading import BoundedSemaphore, Lock
+import time
+
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+    ParamValidationError
+)
+
+from helpers.logHelpers import createLog
+from helpers.codecHelpers import dumps
+from helpers.errorHelpers import CircuitOpen
+
+logger = createLog('breakerHelpers')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+THROTTLING_CODES = set([
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'SlowDown'
+])
+
+# Client methods that do not make a request, or that return objects making
+# their own requests, are passed through without the breaker
+UNPROTECTED = set([
+    'can_paginate',
+    'close',
+    'exceptions',
+    'generate_presigned_post',
+    'generate_presigned_url',
+    'get_paginator',
+    'get_waiter',
+    'meta',
+    'waiter_names'
+])
+
+# Breakers are kept at module level so that their state survives across warm
+# invocations of the same Lambda container
+breakers = {}
+
+
+def isFailure(err):
+    """Decides whether an exception indicates a degraded downstream service.
+    Server errors, throttling and connection errors count against the breaker,
+    errors caused by the request itself (e.g. a missing key) do not.
+
+    Arguments:
+        err {Exception} -- The exception raised by a client call
+
+    Returns:
+        bool -- True if the exception should count as a failure
+    """
+    if isinstance(err, ClientError):
+        status = err.response.get('ResponseMetadata', {})\
+            .get('HTTPStatusCode', 0)
+        code = err.response.get('Error', {}).get('Code', None)
+        return status >= 500 or code in THROTTLING_CODES
+
+    if isinstance(err, ParamValidationError):
+        return False
+
+    return isinstance(err, BotoCoreError)
+
+
+class CircuitBreaker(object):
+    """Tracks the outcome of calls to a downstream service over a sliding time
+    window. The breaker opens once enough calls have been made and either the
+    error rate or the rate of calls slower than the latency threshold passes
+    its limit. While open every call fails fast with CircuitOpen. After the
+    open duration a limited number of probe calls are let through (half open)
+    and the breaker closes again if they succeed.
+
+    If maxConcurrent is set the breaker also acts as a bulkhead, failing calls
+    fast with CircuitOpen while that many are already in flight, so that a
+    slow downstream service cannot tie up every thread of the function.
+    """
+    def __init__(self, name, windowSeconds=60, minCalls=10,
+                 errorThreshold=0.5, latencyThreshold=None,
+                 slowCallThreshold=0.5, openSeconds=30, halfOpenCalls=1,
+                 maxConcurrent=None):
+        self.name = name
+        self.windowSeconds = windowSeconds
+        self.minCalls = minCalls
+        self.errorThreshold = errorThreshold
+        self.latencyThreshold = latencyThreshold
+        self.slowCallThreshold = slowCallThreshold
+        self.openSeconds = openSeconds
+        self.halfOpenCalls = halfOpenCalls
+        self.maxConcurrent = maxConcurrent
+
+        self.lock = Lock()
+        self.slots = None
+        if maxConcurrent is not None:
+            self.slots = BoundedSemaphore(maxConcurrent)
+        self.state = CLOSED
+        # Running totals of the calls in the window are kept alongside it so
+        # that recording a call does not rescan the window
+        self.window = deque()
+        self.failedCount = 0
+        self.slowCount = 0
+        self.openedAt = None
+        self.probes = 0
+        self.rejected = 0
+        self.loggedRejected = 0
+        self.opened = 0
+
+    def record(self, now, failed, slow):
+        self.window.append((now, failed, slow))
+        self.failedCount += failed
+        self.slowCount += slow
+
+    def prune(self, now):
+        while self.window and now - self.window[0][0] > self.windowSeconds:
+            _, failed, slow = self.window.popleft()
+            self.failedCount -= failed
+            self.slowCount -= slow
+
+    def reset(self):
+        self.window.clear()
+        self.failedCount = 0
+        self.slowCount = 0
+
+    def rates(self):
+        calls = len(self.window)
+        if calls < 1:
+            return 0, 0, 0
+        return calls, self.failedCount / calls, self.slowCount / calls
+
+    def trip(self, now):
+        logger.warning('Circuit {} opened'.format(self.name))
+        self.state = OPEN
+        self.openedAt = now
+        self.opened += 1
+        self.reset()
+
+    def before(self):
+        """Checks whether a call may be made.
+
+        Raises:
+            CircuitOpen: The breaker is open, or half open with all probe
+            calls already in flight
+        """
+        with self.lock:
+            if self.state == OPEN:
+                if time.time() - self.openedAt < self.openSeconds:
+                    self.rejected += 1
+                    raise CircuitOpen(
+                        'Circuit {} is open'.format(self.name), self.name
+                    )
+                logger.info('Circuit {} half open'.format(self.name))
+                self.state = HALF_OPEN
+                self.probes = 0
+
+            if self.state == HALF_OPEN:
+                if self.probes >= self.halfOpenCalls:
+                    self.rejected += 1
+                    raise CircuitOpen(
+                        'Circuit {} is half open'.format(self.name), self.name
+                    )
+                self.probes += 1
+
+    def after(self, failed, latency):
+        """Records the outcome of a call.
+
+        Arguments:
+            failed {bool} -- Whether the call failed
+            latency {float} -- The duration of the call in seconds
+        """
+        now = time.time()
+        slow = (
+            self.latencyThreshold is not None
+            and latency > self.latencyThreshold
+        )
+
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probes -= 1
+                if failed or slow:
+                    self.trip(now)
+                else:
+                    logger.info('Circuit {} closed'.format(self.name))
+                    self.state = CLOSED
+                    self.reset()
+                return
+
+            if self.state == OPEN:
+                return
+
+            self.record(now, failed, slow)
+            self.prune(now)
+            calls, errorRate, slowRate = self.rates()
+            if calls >= self.minCalls and (
+                errorRate >= self.errorThreshold
+                or slowRate >= self.slowCallThreshold
+            ):
+                self.trip(now)
+
+    def call(self, func, *args, **kwargs):
+        """Invokes a function through the breaker.
+
+        Arguments:
+            func {function} -- The function to invoke
+
+        Raises:
+            CircuitOpen: The breaker is not allowing calls, or maxConcurrent
+            calls are already in flight
+
+        Returns:
+            object -- The result of the function
+        """
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise CircuitOpen(
+                'Circuit {} has {} calls in flight'.format(
+                    self.name, self.maxConcurrent
+                ),
+                self.name
+            )
+
+        try:
+            self.before()
+            start = time.time()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as err:
+                self.after(isFailure(err), time.time() - start)
+                raise err
+
+            self.after(False, time.time() - start)
+            return result
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+
+    def metrics(self):
+        with self.lock:
+            self.prune(time.time())
+            calls, errorRate, slowRate = self.rates()
+            return {
+                'name': self.name,
+                'state': self.state,
+                'calls': calls,
+                'errorRate': errorRate,
+                'slowRate': slowRate,
+                'rejected': self.rejected,
+                'opened': self.opened
+            }
+
+
+class ProtectedClient(object):
+    """Wraps a boto3 client so that every API call is made through a circuit
+    breaker. All other attributes are passed through to the client. Note
+    that paginators and waiters make their requests outside of the breaker.
+    """
+    def __init__(self, client, breaker):
+        self.client = client
+        self.breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name in UNPROTECTED or name.startswith('_') or not callable(attr):
+            return attr
+
+        def protected(*args, **kwargs):
+            return self.breaker.call(attr, *args, **kwargs)
+
+        return protected
+
+
+def getBreaker(name, **settings):
+    """Returns the persistent breaker with a name, creating it with the
+    provided settings on the first call. See CircuitBreaker for settings."""
+    if name not in breakers:
+        breakers[name] = CircuitBreaker(name, **settings)
+
+    return breakers[name]
+
+
+def protectClient(client, **settings):
+    """Wraps a boto3 client in the persistent breaker for its service and
+    endpoint, so that clients for the same service in different regions or
+    against different endpoints trip independently.
+
+    Arguments:
+        client {boto3.client} -- The client to protect
+
+    Returns:
+        ProtectedClient -- The wrapped client
+    """
+    name = '{}:{}'.format(
+        client.meta.service_model.service_name,
+        client.meta.endpoint_url
+    )
+    return ProtectedClient(client, getBreaker(name, **settings))
+
+
+def breakerMetrics():
+    """Returns the current state of every breaker
+
+    Returns:
+        list -- A dict of state, call count, error and slow call rates and
+        rejected/opened counts for each breaker
+    """
+    return [breaker.metrics() for breaker in breakers.values()]
+
+
+def logBreakerMetrics(namespace='CircuitBreakers'):
+    """Writes the state of every breaker to the logs in CloudWatch Embedded
+    Metric Format, creating a metric per breaker without any API calls. The
+    line is printed directly as EMF must not carry the logger's prefix.
+
+    Keyword Arguments:
+        namespace {string} -- The CloudWatch metric namespace
+        (default: {'CircuitBreakers'})
+    """
+    for breaker in list(breakers.values()):
+        metrics = breaker.metrics()
+        # Only the rejections since the last report are counted
+        rejected = metrics['rejected'] - breaker.loggedRejected
+        breaker.loggedRejected = metrics['rejected']
+        print(dumps({
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [['Breaker']],
+                    'Metrics': [
+                        {'Name': 'State', 'Unit': 'None'},
+                        {'Name': 'ErrorRate', 'Unit': 'None'},
+                        {'Name': 'SlowRate', 'Unit': 'None'},
+                        {'Name': 'Rejected', 'Unit': 'Count'}
+                    ]
+                }]
+            },
+            'Breaker': metrics['name'],
+            'State': STATE_VALUES[metrics['state']],
+            'ErrorRate': metrics['errorRate'],
+            'SlowRate': metrics['slowRate'],
+            'Rejected': rejected
+        }))
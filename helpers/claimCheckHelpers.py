@@ -0,0 +1,251 @@
+import csv
+import re
+
+from botocore.exceptions import ClientError
+
+from helpers.logHelpers import createLog
+from helpers.codecHelpers import loads
+from helpers.prewarmHelpers import getClient
+
+logger = createLog('claimCheckHelpers')
+
+# Marker used by the AWS extended client libraries for SQS/SNS when a payload
+# has been offloaded to S3
+EXTENDED_CLIENT_POINTER = 'software.amazon.payloadoffloading.PayloadS3Pointer'
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+contentRangeRegex = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+def parsePointer(payload):
+    """Detects whether a record payload is a claim-check pointer to an object
+    in S3. Both the format written by the AWS extended client libraries and a
+    plain object containing `s3BucketName` and `s3Key` are recognized.
+
+    Arguments:
+        payload {string|bytes|dict|list} -- The decoded body of a record
+
+    Returns:
+        tuple|None -- The bucket and key of the object if the payload is a
+        pointer, otherwise None
+    """
+    if isinstance(payload, (str, bytes)):
+        # Pointers are always small JSON documents, skip anything else
+        # without attempting to parse it
+        if len(payload) > 4096 or payload[:1] not in ('[', '{', b'[', b'{'):
+            return None
+        try:
+            payload = loads(payload)
+        except ValueError:
+            return None
+
+    if (
+        isinstance(payload, list)
+        and len(payload) == 2
+        and payload[0] == EXTENDED_CLIENT_POINTER
+    ):
+        payload = payload[1]
+
+    if (
+        isinstance(payload, dict)
+        and 's3BucketName' in payload
+        and 's3Key' in payload
+    ):
+        return (payload['s3BucketName'], payload['s3Key'])
+
+    return None
+
+
+def streamObject(client, bucket, key, chunkSize=DEFAULT_CHUNK_SIZE):
+    """Streams an object from S3 through a series of ranged GET requests so
+    that no more than a single chunk is ever held in memory.
+
+    Arguments:
+        client {boto3.client} -- An S3 client
+        bucket {string} -- The bucket containing the object
+        key {string} -- The key of the object
+
+    Keyword Arguments:
+        chunkSize {int} -- The number of bytes to request at a time
+        (default: {DEFAULT_CHUNK_SIZE})
+
+    Raises:
+        ClientError: Any error from S3 other than a request for a range beyond
+        the end of an empty object, including PreconditionFailed if the object
+        is overwritten while it is being streamed
+
+    Yields:
+        bytes -- Consecutive chunks of the object
+    """
+    start = 0
+    size = None
+    etag = None
+
+    while size is None or start < size:
+        params = {
+            'Bucket': bucket,
+            'Key': key,
+            'Range': 'bytes={}-{}'.format(start, start + chunkSize - 1)
+        }
+        # Each range is a separate request, so later ranges are pinned to the
+        # version of the object returned by the first
+        if etag is not None:
+            params['IfMatch'] = etag
+
+        try:
+            resp = client.get_object(**params)
+        except ClientError as err:
+            if err.response['Error']['Code'] == 'InvalidRange':
+                logger.debug('Empty object {}/{}'.format(bucket, key))
+                return
+            logger.error('Unable to read s3://{}/{}'.format(bucket, key))
+            raise err
+
+        size = parseObjectSize(resp)
+        etag = etag or resp.get('ETag', None)
+        chunk = resp['Body'].read()
+        if not chunk:
+            return
+
+        yield chunk
+        start += len(chunk)
+
+
+def parseObjectSize(resp):
+    """Reads the total size of an object from a ranged GET response, falling
+    back to the length of the response if no range was returned.
+
+    Arguments:
+        resp {dict} -- A response from S3 get_object
+
+    Returns:
+        int -- The size of the full object in bytes
+    """
+    match = contentRangeRegex.match(resp.get('ContentRange', None) or '')
+    if match and match.group(3) != '*':
+        return int(match.group(3))
+
+    return resp['ContentLength']
+
+
+def iterLines(chunks, keepEnds=False):
+    """Splits a stream of byte chunks into lines, holding only the current
+    chunk and any partial line carried over from the previous one.
+
+    Arguments:
+        chunks {iterable} -- An iterable of bytes
+
+    Keyword Arguments:
+        keepEnds {bool} -- Retain the trailing newline on each line
+        (default: {False})
+
+    Yields:
+        bytes -- Each line in the stream
+    """
+    remainder = b''
+    for chunk in chunks:
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            yield line + b'\n' if keepEnds else line
+
+    if remainder:
+        yield remainder
+
+
+def parseJSONLines(chunks):
+    """Incrementally parses a stream of newline delimited JSON.
+
+    Arguments:
+        chunks {iterable} -- An iterable of bytes
+
+    Yields:
+        dict -- Each parsed JSON document, blank lines are skipped
+    """
+    for line in iterLines(chunks):
+        if line.strip():
+            yield loads(line)
+
+
+def parseCSV(chunks, encoding='utf-8'):
+    """Incrementally parses a stream of CSV with a header row. Quoted fields
+    spanning multiple lines are supported.
+
+    Arguments:
+        chunks {iterable} -- An iterable of bytes
+
+    Keyword Arguments:
+        encoding {string} -- The encoding of the file (default: {'utf-8'})
+
+    Yields:
+        dict -- Each row, keyed by the header
+    """
+    lines = (
+        line.decode(encoding) for line in iterLines(chunks, keepEnds=True)
+    )
+    for row in csv.DictReader(lines):
+        yield row
+
+
+PARSERS = {
+    'jsonl': parseJSONLines,
+    'csv': parseCSV
+}
+
+
+def expandRecord(payload, client=None, fileFormat=None,
+                 chunkSize=DEFAULT_CHUNK_SIZE):
+    """Resolves a single record payload. Claim-check pointers are replaced by
+    the parsed contents of the referenced object, any other payload is passed
+    through unchanged.
+
+    Arguments:
+        payload {string|bytes|dict|list} -- The decoded body of a record
+
+    Keyword Arguments:
+        client {boto3.client} -- An S3 client. If None the shared client from
+        helpers.prewarmHelpers is used (default: {None})
+        fileFormat {string} -- One of [jsonl|csv]. If None the format is
+        inferred from the object key, defaulting to jsonl (default: {None})
+        chunkSize {int} -- The number of bytes to request at a time
+        (default: {DEFAULT_CHUNK_SIZE})
+
+    Yields:
+        [dict|object] -- Parsed rows of the object, or the original payload
+    """
+    pointer = parsePointer(payload)
+    if pointer is None:
+        yield payload
+        return
+
+    bucket, key = pointer
+    if fileFormat is None:
+        fileFormat = 'csv' if key.lower().endswith('.csv') else 'jsonl'
+
+    if client is None:
+        client = getClient('s3')
+
+    logger.debug('Streaming claim-check payload s3://{}/{}'.format(
+        bucket, key
+    ))
+    chunks = streamObject(client, bucket, key, chunkSize=chunkSize)
+    for row in PARSERS[fileFormat](chunks):
+        yield row
+
+
+def expandRecords(payloads, client=None, fileFormat=None,
+                  chunkSize=DEFAULT_CHUNK_SIZE):
+    """Resolves an iterable of record payloads as a single generator, see
+    expandRecord for details.
+
+    Arguments:
+        payloads {iterable} -- Decoded record bodies
+
+    Yields:
+        [dict|object] -- Parsed rows of any claim-check objects and the
+        original payloads of any other records
+    """
+    for payload in payloads:
+        for row in expandRecord(payload, client, fileFormat, chunkSize):
+            yield row
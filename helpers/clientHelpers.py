@@ -1,13 +1,14 @@
-import json
 import boto3
 
 from helpers.logHelpers import createLog
+from helpers.codecHelpers import loads, DecodeError
+from helpers.breakerHelpers import protectClient
 from helpers.configHelpers import loadEnvVars, loadEnvFile
 
 logger = createLog('clientHelpers')
 
 
-def createAWSClient(service, configDict=None):
+def createAWSClient(service, configDict=None, breaker=None):
     """Creates a boto3 client object for communicating with a specific AWS
     service. This is always invoked by the lambda run/deployment scripts to
     create a client to the Lambda service, but can also be invoked within the
@@ -19,6 +20,9 @@ def createAWSClient(service, configDict=None):
     Keyword Arguments:
         configDict {string} -- AWS Configuration details. If None/not provided
         details will be loaded from default config.yaml file (default: {None})
+        breaker {dict|bool} -- Settings for a circuit breaker to wrap the
+        client in, or True for the default settings. See
+        helpers.breakerHelpers.CircuitBreaker (default: {None})
 
     Returns:
         [boto3.client] -- A client object that can be used to invoke various
@@ -44,6 +48,10 @@ def createAWSClient(service, configDict=None):
         **clientKwargs
     )
 
+    if breaker:
+        breakerSettings = breaker if isinstance(breaker, dict) else {}
+        return protectClient(lambdaClient, **breakerSettings)
+
     return lambdaClient
 
 
@@ -68,8 +76,8 @@ def createEventMapping(runType):
     try:
         with open('config/event_sources_{}.json'.format(runType)) as sources:
             try:
-                eventMappings = json.load(sources)
-            except json.decoder.JSONDecodeError as err:
+                eventMappings = loads(sources.read())
+            except DecodeError as err:
                 logger.error('Unable to parse JSON file')
                 raise err
     except FileNotFoundError:
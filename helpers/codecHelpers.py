@@ -0,0 +1,109 @@
+import json
+import os
+
+from helpers.logHelpers import createLog
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = createLog('codecHelpers')
+
+# All decoding errors are raised as this type, regardless of the codec used
+DecodeError = json.JSONDecodeError
+
+
+def _orjsonLoads(data):
+    # orjson accepts bytes, bytearray, memoryview and str without a copy
+    return orjson.loads(data)
+
+
+def _orjsonDumps(obj, pretty=False):
+    option = orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, option=option).decode('utf-8')
+
+
+def _ujsonLoads(data):
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    try:
+        return ujson.loads(data)
+    except ValueError as err:
+        raise DecodeError(str(err), str(data[:64]), 0)
+
+
+def _ujsonDumps(obj, pretty=False):
+    return ujson.dumps(obj, ensure_ascii=False, indent=2 if pretty else 0)
+
+
+def _jsonLoads(data):
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _jsonDumps(obj, pretty=False):
+    return json.dumps(obj, indent=2 if pretty else None)
+
+
+CODECS = {
+    'orjson': (orjson, _orjsonLoads, _orjsonDumps),
+    'ujson': (ujson, _ujsonLoads, _ujsonDumps),
+    'json': (json, _jsonLoads, _jsonDumps)
+}
+
+PREFERENCE = ['orjson', 'ujson', 'json']
+
+
+def selectCodec(name=None):
+    """Selects the fastest available JSON codec. A specific codec can be
+    requested, e.g. through the JSON_CODEC environment variable, and the
+    stdlib json module is used if it is not installed.
+
+    Keyword Arguments:
+        name {string} -- One of [orjson|ujson|json]. If None the first
+        installed codec in order of preference is used (default: {None})
+
+    Returns:
+        tuple -- The name of the codec and its loads and dumps functions
+    """
+    candidates = PREFERENCE
+    if name is not None:
+        if name not in CODECS or CODECS[name][0] is None:
+            logger.warning('JSON codec {} not available'.format(name))
+        else:
+            candidates = [name]
+
+    for candidate in candidates:
+        module, loadFunc, dumpFunc = CODECS[candidate]
+        if module is not None:
+            return candidate, loadFunc, dumpFunc
+
+
+# loads accepts str, bytes, bytearray or memoryview and raises DecodeError on
+# malformed input. dumps always returns a str, indented by two spaces if
+# called with pretty=True
+codecName, loads, dumps = selectCodec(os.environ.get('JSON_CODEC', None))
+
+
+class LazyJSON(object):
+    """Wraps an object so that it is only encoded as JSON if a log message
+    is actually emitted, e.g. logger.debug(LazyJSON(event))"""
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        try:
+            return dumps(self.obj)
+        except (TypeError, ValueError, OverflowError):
+            return repr(self.obj)
@@ -103,7 +103,7 @@ def setEnvVars(runType):
         raise err
 
 
-def decryptEnvVar(envVar):
+def decryptEnvVar(envVar, kmsClient=None):
     """This helper method takes a KMS encoded environment variable and decrypts
     it into a usable value. Sensitive variables should be so encoded so that
     they can be stored in git and used in a CI/CD environment.
@@ -111,14 +111,20 @@ def decryptEnvVar(envVar):
     Arguments:
         envVar {string} -- a string, either plaintext or a base64, encrypted
         value
+
+    Keyword Arguments:
+        kmsClient {boto3.client} -- An existing KMS client to reuse. If None a
+        new client will be created (default: {None})
     """
     encrypted = os.environ.get(envVar, None)
 
     try:
         decoded = b64decode(encrypted)
-        # If region is not set, assume us-east-1
-        regionName = os.environ.get('AWS_REGION', 'us-east-1')
-        return boto3.client('kms', region_name=regionName)\
-            .decrypt(CiphertextBlob=decoded)['Plaintext'].decode('utf-8')
+        if kmsClient is None:
+            # If region is not set, assume us-east-1
+            regionName = os.environ.get('AWS_REGION', 'us-east-1')
+            kmsClient = boto3.client('kms', region_name=regionName)
+        return kmsClient.decrypt(CiphertextBlob=decoded)['Plaintext']\
+            .decode('utf-8')
     except (ClientError, base64Error, TypeError):
         return encrypted
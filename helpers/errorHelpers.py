@@ -8,3 +8,25 @@ class NoRecordsReceived(Exception):
 class InvalidExecutionType(Exception):
     def __init__(self, message):
         self.message = message
+
+
+class UnroutableEvent(Exception):
+    def __init__(self, message, event):
+        self.message = message
+        self.event = event
+
+
+class PoolWorkerError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class CircuitOpen(Exception):
+    def __init__(self, message, breaker):
+        self.message = message
+        self.breaker = breaker
+
+
+class BuildFailed(Exception):
+    def __init__(self, message):
+        self.message = message
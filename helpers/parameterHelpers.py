@@ -0,0 +1,169 @@
+from threading import Lock, Thread
+import time
+
+from helpers.logHelpers import createLog
+from helpers.clientHelpers import createAWSClient
+
+logger = createLog('parameterHelpers')
+
+DEFAULT_TTL = 300
+
+# Seconds to wait after a failed refresh before the next is attempted, so an
+# SSM outage does not start a new refresh on every read
+RETRY_INTERVAL = 30
+
+# GetParameters accepts at most 10 names per call
+MAX_NAMES_PER_CALL = 10
+
+# Stores are kept at module level so that cached values survive across warm
+# invocations of the same Lambda container
+stores = {}
+
+
+class ParameterStore(object):
+    """A cached configuration source backed by SSM Parameter Store. All
+    parameters are fetched in batched calls on the first read and are served
+    from memory afterwards. Once the TTL has passed the cached values continue
+    to be served while a refresh runs in the background (stale while
+    revalidate), so no read ever waits on the network after the first.
+
+    Note that Lambda freezes background threads between invocations, so a
+    refresh started late in one invocation may complete in the next.
+    """
+    def __init__(self, path=None, names=None, ttl=DEFAULT_TTL, client=None,
+                 decrypt=True):
+        # The root path must be kept as is, GetParametersByPath rejects ''
+        self.path = (path.rstrip('/') or '/') if path else None
+        self.names = names or []
+        self.ttl = ttl
+        self.client = client
+        self.decrypt = decrypt
+        self.values = None
+        self.loadedAt = None
+        self.retryAt = None
+        self.refreshLock = Lock()
+        self.refreshing = False
+
+    def fetch(self):
+        """Retrieves all parameters under the store's path and any individually
+        named parameters.
+
+        Returns:
+            dict -- Parameter values keyed by their full name
+        """
+        if self.client is None:
+            self.client = createAWSClient('ssm')
+
+        values = {}
+
+        if self.path is not None:
+            paginator = self.client.get_paginator('get_parameters_by_path')
+            for page in paginator.paginate(
+                Path=self.path,
+                Recursive=True,
+                WithDecryption=self.decrypt
+            ):
+                for param in page['Parameters']:
+                    values[param['Name']] = param['Value']
+
+        for i in range(0, len(self.names), MAX_NAMES_PER_CALL):
+            resp = self.client.get_parameters(
+                Names=self.names[i:i + MAX_NAMES_PER_CALL],
+                WithDecryption=self.decrypt
+            )
+            for param in resp['Parameters']:
+                values[param['Name']] = param['Value']
+            if len(resp.get('InvalidParameters', [])) > 0:
+                logger.warning('Parameters not found: {}'.format(
+                    ', '.join(resp['InvalidParameters'])
+                ))
+
+        return values
+
+    def load(self):
+        """Fetches all parameters and replaces the cached values. Should be
+        invoked during the init phase, e.g. through the prewarm stage.
+
+        Returns:
+            dict -- The loaded parameter values
+        """
+        values = self.fetch()
+        self.values = values
+        self.loadedAt = time.time()
+        self.retryAt = None
+        logger.debug('Loaded {} parameters'.format(len(values)))
+        return values
+
+    def refresh(self):
+        try:
+            self.load()
+        except Exception as err:
+            logger.warning('Unable to refresh parameters, serving stale')
+            logger.debug(err)
+            self.retryAt = time.time() + min(self.ttl, RETRY_INTERVAL)
+        finally:
+            self.refreshing = False
+
+    def refreshInBackground(self):
+        with self.refreshLock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        Thread(target=self.refresh, daemon=True).start()
+
+    def isStale(self):
+        now = time.time()
+        if self.retryAt is not None and now < self.retryAt:
+            return False
+        return now - self.loadedAt > self.ttl
+
+    def get(self, name, default=None):
+        """Returns the cached value of a parameter. The first read loads all
+        parameters, later reads trigger a background refresh if the cache is
+        older than the TTL.
+
+        Arguments:
+            name {string} -- The full name of the parameter, or a name relative
+            to the store's path
+
+        Keyword Arguments:
+            default {object} -- Returned if the parameter does not exist
+            (default: {None})
+
+        Returns:
+            string -- The value of the parameter
+        """
+        if self.values is None:
+            self.load()
+
+        values = self.values
+        if self.isStale():
+            self.refreshInBackground()
+
+        if not name.startswith('/') and self.path is not None:
+            name = '{}/{}'.format(self.path.rstrip('/'), name)
+
+        return values.get(name, default)
+
+
+def getParameterStore(path=None, names=None, ttl=DEFAULT_TTL):
+    """Returns the persistent store for a parameter path and/or list of names,
+    creating it on the first call. Parameters are not fetched until the store
+    is first read or load is called.
+
+    Keyword Arguments:
+        path {string} -- A parameter hierarchy to load recursively
+        (default: {None})
+        names {list} -- Individual parameter names to load (default: {None})
+        ttl {int} -- Seconds before cached values are refreshed
+        (default: {DEFAULT_TTL})
+
+    Returns:
+        ParameterStore -- The store for the path and names
+    """
+    key = (path, tuple(names or []))
+    if key not in stores:
+        stores[key] = ParameterStore(path=path, names=names, ttl=ttl)
+
+    return stores[key]
@@ -0,0 +1,203 @@
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import threading
+import traceback
+
+from helpers.logHelpers import createLog
+from helpers.errorHelpers import PoolWorkerError
+
+logger = createLog('poolHelpers')
+
+# Pools are kept at module level so that their workers survive across warm
+# invocations of the same Lambda container
+pools = {}
+
+
+def availableCPUs():
+    """Returns the number of CPUs this process may run on, which in Lambda
+    scales with the configured memory_size"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _worker(func, conn):
+    """Receives chunks of records from the parent process until a None
+    sentinel is received, applying func to each record. Exceptions are
+    returned to the parent rather than raised here."""
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+
+        if message is None:
+            return
+
+        index, chunk = message
+        try:
+            conn.send((index, True, [func(record) for record in chunk]))
+        except Exception:
+            conn.send((index, False, traceback.format_exc()))
+
+
+class PipePool(object):
+    """A process pool for CPU-bound record transforms that communicates only
+    through multiprocessing.Pipe. Lambda provides no /dev/shm, so
+    multiprocessing.Pool and Queue cannot be used there as they depend on
+    shared memory semaphores.
+
+    Workers are started when the pool is created and reused for every call to
+    map, so the pool should be created during the init phase, e.g. with
+    getPool at module level in service.py. Workers are forked, so the pool
+    must be created before prewarm or anything else that starts threads, as a
+    lock held by another thread (e.g. in logging or botocore) at the time of
+    the fork is never released in the worker.
+    """
+    def __init__(self, func, processes=None):
+        self.func = func
+        self.processes = processes or availableCPUs()
+        self.workers = []
+        self.start()
+
+    def start(self):
+        if threading.active_count() > 1:
+            logger.warning(
+                'Forking pool workers while other threads are running, '
+                'create the pool before prewarm'
+            )
+
+        # fork is used explicitly so that func does not need to be picklable
+        context = multiprocessing.get_context('fork')
+        for _ in range(self.processes):
+            parentConn, childConn = context.Pipe()
+            proc = context.Process(
+                target=_worker, args=(self.func, childConn), daemon=True
+            )
+            proc.start()
+            childConn.close()
+            self.workers.append((proc, parentConn))
+
+        logger.debug('Started {} pool workers'.format(self.processes))
+
+    def close(self):
+        for proc, conn in self.workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc, conn in self.workers:
+            proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+        self.workers = []
+
+    def restart(self):
+        logger.warning('Restarting pool workers')
+        for proc, conn in self.workers:
+            proc.terminate()
+            conn.close()
+        self.workers = []
+        self.start()
+
+    def map(self, records, chunkSize=None):
+        """Applies the pool's function to each record across all workers.
+
+        Arguments:
+            records {iterable} -- The records to transform
+
+        Keyword Arguments:
+            chunkSize {int} -- The number of records sent to a worker at a
+            time. If None records are split into four chunks per worker
+            (default: {None})
+
+        Raises:
+            PoolWorkerError: The function raised an exception for a record, or
+            a worker process exited unexpectedly
+            PicklingError: A record or result could not be sent between
+            processes. Any exception raised while chunks are in flight
+            restarts the workers so no result is read by a later call
+
+        Returns:
+            list -- The transformed records, in the same order as the input
+        """
+        records = list(records)
+        if len(records) < 1:
+            return []
+
+        if chunkSize is None:
+            chunkSize = -(-len(records) // (self.processes * 4))
+
+        chunks = [
+            records[i:i + chunkSize]
+            for i in range(0, len(records), chunkSize)
+        ]
+        results = [None] * len(chunks)
+        pending = iter(enumerate(chunks))
+        inFlight = {conn: 0 for proc, conn in self.workers}
+        failure = None
+
+        def sendNext(conn):
+            message = next(pending, None)
+            if message is not None:
+                conn.send(message)
+                inFlight[conn] += 1
+
+        try:
+            # Only one chunk is sent to a worker at a time. With more in flight
+            # a worker blocked sending a large result and the parent blocked
+            # sending it the next large chunk would wait on each other forever
+            for conn in inFlight:
+                sendNext(conn)
+
+            while any(inFlight.values()):
+                busy = [conn for conn, count in inFlight.items() if count > 0]
+                for conn in wait(busy):
+                    index, ok, payload = conn.recv()
+                    inFlight[conn] -= 1
+                    if not ok:
+                        # Stop sending new work but drain what is in flight
+                        # so the workers are idle for the next invocation
+                        failure = failure or payload
+                        pending = iter([])
+                        continue
+
+                    results[index] = payload
+                    sendNext(conn)
+        except (EOFError, OSError):
+            self.restart()
+            raise PoolWorkerError('Pool worker exited unexpectedly')
+        except Exception:
+            # Results of chunks already sent would otherwise be left in the
+            # pipes and read by the next call to map
+            self.restart()
+            raise
+
+        if failure is not None:
+            logger.error('Pool worker raised an exception')
+            raise PoolWorkerError(failure)
+
+        return [record for chunk in results for record in chunk]
+
+
+def getPool(func, processes=None):
+    """Returns the persistent pool for a function, starting its workers on the
+    first call.
+
+    Arguments:
+        func {function} -- The transform to apply to each record
+
+    Keyword Arguments:
+        processes {int} -- The number of worker processes. If None one is
+        started per available CPU (default: {None})
+
+    Returns:
+        PipePool -- A started pool
+    """
+    if func not in pools:
+        pools[func] = PipePool(func, processes)
+
+    return pools[func]
@@ -0,0 +1,235 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+
+from helpers.logHelpers import createLog
+from helpers.clientHelpers import createAWSClient
+from helpers.configHelpers import loadEnvVars, decryptEnvVar
+from helpers.parameterHelpers import getParameterStore
+
+logger = createLog('prewarmHelpers')
+
+# Anything warmed during the init phase is kept here at module level so that
+# it survives across warm invocations of the same Lambda container
+warmed = {
+    'config': {},
+    'clients': {},
+    'secrets': {}
+}
+
+# boto3's default session is not thread-safe when creating clients, so client
+# construction is serialized while the network calls still run concurrently
+clientLock = Lock()
+
+DEFAULT_BUDGET = 5
+
+
+def prewarm(configDict=None):
+    """Executes the declarative prewarm stage defined in the `prewarm` block
+    of the configuration file. This should be invoked at module level in the
+    handler so that it runs during the Lambda init phase, which receives a CPU
+    burst and is run ahead of traffic for provisioned concurrency.
+
+    All clients, secrets and parameters are warmed concurrently. Any task that
+    does not complete within the time budget is left to finish in the
+    background and the value will be created on demand if it is requested
+    before then.
+
+    Keyword Arguments:
+        configDict {dict} -- Configuration details. If None/not provided these
+        will be loaded from the config files for the current ENV
+        (default: {None})
+
+    Returns:
+        dict -- The warmed config, clients and secrets
+    """
+    if configDict is None:
+        configDict = loadEnvVars(os.environ.get('ENV', None))
+
+    warmed['config'] = configDict
+
+    prewarmConfig = configDict.get('prewarm', None)
+    if not prewarmConfig:
+        logger.debug('No prewarm stage configured')
+        return warmed
+
+    clientSpecs = prewarmConfig.get('clients', None) or []
+    secrets = prewarmConfig.get('secrets', None) or []
+    parameters = prewarmConfig.get('parameters', None)
+    budget = prewarmConfig.get('timeout', DEFAULT_BUDGET)
+
+    tasks = []
+    for spec in clientSpecs:
+        tasks.append((warmClient, parseClientSpec(spec)))
+
+    if len(secrets) > 0:
+        # A single KMS client is shared across all of the decryption calls
+        tasks.append((warmSecrets, (secrets, configDict)))
+
+    if parameters:
+        tasks.append((warmParameters, (parameters,)))
+
+    if len(tasks) < 1:
+        return warmed
+
+    logger.info('Prewarming {} clients and {} secrets'.format(
+        len(clientSpecs), len(secrets)
+    ))
+
+    executor = ThreadPoolExecutor(max_workers=len(tasks))
+    futures = [executor.submit(func, *args) for func, args in tasks]
+    done, notDone = wait(futures, timeout=budget)
+    # Do not block init on stragglers, they will complete in the background
+    executor.shutdown(wait=False)
+
+    if len(notDone) > 0:
+        logger.warning('{} prewarm tasks exceeded the {}s budget'.format(
+            len(notDone), budget
+        ))
+
+    for future in done:
+        if future.exception() is not None:
+            logger.warning('Prewarm task failed')
+            logger.debug(future.exception())
+
+    return warmed
+
+
+def parseClientSpec(spec):
+    """Normalizes a client entry from the prewarm block. Entries can either be
+    a plain service name or a mapping that also names a cheap operation to
+    invoke, which opens the underlying HTTPS connection ahead of time, and/or
+    circuit breaker settings for the client.
+
+    Arguments:
+        spec {string|dict} -- A service name or a dict containing `service`
+        and optionally `operation`, `params` and `breaker`
+
+    Returns:
+        tuple -- The service name, operation name, operation parameters and
+        breaker settings
+    """
+    if isinstance(spec, str):
+        return (spec, None, {}, None)
+
+    return (
+        spec['service'],
+        spec.get('operation', None),
+        spec.get('params', None) or {},
+        spec.get('breaker', None)
+    )
+
+
+def warmClient(service, operation, params, breaker=None):
+    """Creates a client for the service and, if an operation is provided,
+    invokes it to establish a connection. The result of the operation is
+    discarded and errors from it are ignored, as even a failed request leaves
+    behind a pooled connection.
+
+    Arguments:
+        service {string} -- The AWS service to create a client for
+        operation {string} -- The name of a client method to invoke, or None
+        params {dict} -- Keyword arguments for the operation
+
+    Keyword Arguments:
+        breaker {dict|bool} -- Circuit breaker settings for the client
+        (default: {None})
+    """
+    client = getClient(service, breaker=breaker)
+
+    if operation is None:
+        return
+
+    try:
+        getattr(client, operation)(**params)
+    except Exception as err:
+        logger.debug('Warming call {}.{} failed'.format(service, operation))
+        logger.debug(err)
+
+
+def warmSecret(envVar, kmsClient):
+    """Decrypts a KMS encrypted environment variable and caches the result.
+
+    Arguments:
+        envVar {string} -- The name of the environment variable
+        kmsClient {boto3.client} -- A KMS client to decrypt the value with
+    """
+    warmed['secrets'][envVar] = decryptEnvVar(envVar, kmsClient)
+
+
+def warmSecrets(envVars, configDict):
+    """Creates a single KMS client and decrypts each of the secrets with it.
+    The client is created here rather than by the caller so that a failure
+    to create it is handled like that of any other prewarm task.
+
+    Arguments:
+        envVars {list} -- The names of the environment variables
+        configDict {dict} -- AWS Configuration details
+    """
+    kmsClient = getClient('kms', configDict)
+    with ThreadPoolExecutor(max_workers=len(envVars)) as executor:
+        futures = {
+            envVar: executor.submit(warmSecret, envVar, kmsClient)
+            for envVar in envVars
+        }
+
+    for envVar, future in futures.items():
+        if future.exception() is not None:
+            logger.warning('Unable to decrypt {}'.format(envVar))
+            logger.debug(future.exception())
+
+
+def warmParameters(spec):
+    """Loads the configured SSM parameters into their persistent store.
+
+    Arguments:
+        spec {dict} -- A dict containing `path`, `names` and/or `ttl`, see
+        helpers.parameterHelpers.getParameterStore
+    """
+    store = getParameterStore(**spec)
+    if store.client is None:
+        store.client = getClient('ssm')
+    store.load()
+
+
+def getClient(service, configDict=None, breaker=None):
+    """Returns the warmed client for a service, creating and caching it if it
+    was not created during the prewarm stage.
+
+    Arguments:
+        service {string} -- The AWS service to get a client for
+
+    Keyword Arguments:
+        configDict {dict} -- AWS Configuration details. Defaults to the config
+        loaded by the prewarm stage (default: {None})
+        breaker {dict|bool} -- Circuit breaker settings, only applied when
+        the client is first created (default: {None})
+
+    Returns:
+        [boto3.client] -- A client for the requested service
+    """
+    with clientLock:
+        if service not in warmed['clients']:
+            if configDict is None:
+                configDict = warmed['config'] or None
+            warmed['clients'][service] = createAWSClient(
+                service, configDict, breaker=breaker
+            )
+
+    return warmed['clients'][service]
+
+
+def getSecret(envVar):
+    """Returns the decrypted value of an environment variable, using the value
+    decrypted during the prewarm stage if it is available.
+
+    Arguments:
+        envVar {string} -- The name of the environment variable
+
+    Returns:
+        string -- The decrypted value
+    """
+    if envVar not in warmed['secrets']:
+        warmed['secrets'][envVar] = decryptEnvVar(envVar)
+
+    return warmed['secrets'][envVar]
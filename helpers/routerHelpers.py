@@ -0,0 +1,250 @@
+from base64 import b64decode
+from itertools import islice
+
+from helpers.logHelpers import createLog
+from helpers.codecHelpers import loads
+from helpers.claimCheckHelpers import expandRecords
+from helpers.errorHelpers import UnroutableEvent
+
+logger = createLog('routerHelpers')
+
+# Records from stream and queue sources identify their origin on each record,
+# so classifying these events is a single dict lookup on the first record
+RECORD_SOURCES = {
+    'aws:kinesis': 'kinesis',
+    'aws:sqs': 'sqs',
+    'aws:sns': 'sns',
+    'aws:s3': 's3',
+    'aws:dynamodb': 'dynamodb'
+}
+
+
+def _kinesisDecoder(record):
+    return loads(b64decode(record['kinesis']['data']))
+
+
+def _sqsDecoder(record):
+    return loads(record['body'])
+
+
+def _snsDecoder(record):
+    return loads(record['Sns']['Message'])
+
+
+# The default decoding strategy for each source, these can be overridden for
+# each route when it is registered. API Gateway and scheduled events are passed
+# through whole so that routes can read the method, path and headers
+DECODERS = {
+    'kinesis': _kinesisDecoder,
+    'sqs': _sqsDecoder,
+    'sns': _snsDecoder,
+    's3': lambda record: record['s3'],
+    'dynamodb': lambda record: record['dynamodb'],
+    'apigateway': lambda event: event,
+    'scheduled': lambda event: event
+}
+
+# Sources that deliver a single event rather than a batch of records. The
+# result of their route is returned as is, e.g. as an API Gateway response
+SINGLE_EVENT_SOURCES = ('apigateway', 'scheduled')
+
+
+def decodeBody(event):
+    """Decodes the body of an API Gateway event. JSON bodies are parsed, any
+    other content type (e.g. form encoded) is returned as a string, or as
+    bytes if the body is binary.
+
+    Arguments:
+        event {dict} -- An API Gateway proxy event
+
+    Returns:
+        object -- The decoded body, or None if the request had no body
+    """
+    body = event.get('body', None)
+    if body is None:
+        return None
+    if event.get('isBase64Encoded', False):
+        body = b64decode(body)
+
+    headers = event.get('headers', None) or {}
+    contentType = next((
+        value for name, value in headers.items()
+        if name.lower() == 'content-type'
+    ), '')
+    if 'json' in (contentType or '').lower():
+        return loads(body)
+
+    if isinstance(body, bytes):
+        try:
+            return body.decode('utf-8')
+        except UnicodeDecodeError:
+            return body
+
+    return body
+
+
+def classifyEvent(event):
+    """Identifies the source of an event from its shape. Only the top level
+    keys of the event and the first record are ever inspected, as all records
+    in a single invocation are delivered from the same source.
+
+    Arguments:
+        event {dict} -- The event that invoked the function
+
+    Returns:
+        string|None -- One of [kinesis|sqs|sns|s3|dynamodb|apigateway|
+        scheduled] or None if the event was not recognized
+    """
+    # Lambda accepts any JSON payload, not only objects
+    if not isinstance(event, dict):
+        return None
+
+    records = event.get('Records', None)
+    if records:
+        # Payloads with any other shape of Records fall through unclassified
+        if not isinstance(records, list) or not isinstance(records[0], dict):
+            return None
+        first = records[0]
+        # SNS records capitalize this key, all other sources do not
+        eventSource = first.get('eventSource', None)\
+            or first.get('EventSource', None)
+        return RECORD_SOURCES.get(eventSource, None)
+
+    if 'httpMethod' in event or 'routeKey' in event:
+        return 'apigateway'
+
+    if (
+        event.get('source', None) == 'aws.events'
+        and event.get('detail-type', None) == 'Scheduled Event'
+    ):
+        return 'scheduled'
+
+    return None
+
+
+class EventRouter(object):
+    """Dispatches events to the handler registered for their source. This
+    allows a single deployed function to serve several of the triggers in
+    event_sources_{env}.json, with each route configured with its own
+    batching and decoding strategy.
+    """
+    def __init__(self):
+        self.routes = {}
+
+    def register(self, source, func, batchSize=1, decoder=None,
+                 claimCheck=False):
+        """Registers a handler function for an event source.
+
+        Arguments:
+            source {string} -- One of [kinesis|sqs|sns|s3|dynamodb|
+            apigateway|scheduled]
+            func {function} -- Invoked with the decoded payload(s) and the
+            invocation context. API Gateway and scheduled routes receive the
+            whole event, see decodeBody for reading a request body
+
+        Keyword Arguments:
+            batchSize {int} -- The number of payloads passed to each call of
+            func. If 1 func receives a single payload, otherwise a list. If
+            None all payloads are passed in a single list. Ignored for API
+            Gateway and scheduled events (default: {1})
+            decoder {function|string} -- Decodes a raw record into a payload.
+            If None the default for the source is used, if 'raw' records are
+            passed without decoding (default: {None})
+            claimCheck {bool} -- Expand S3 claim-check pointers into the
+            parsed contents of the referenced objects (default: {False})
+        """
+        if source not in DECODERS:
+            raise ValueError('{} is not a supported event source'.format(
+                source
+            ))
+
+        if batchSize is not None and (
+            not isinstance(batchSize, int) or batchSize < 1
+        ):
+            raise ValueError('batchSize must be None or at least 1')
+
+        if decoder is None:
+            decoder = DECODERS[source]
+        elif decoder == 'raw':
+            decoder = None
+
+        self.routes[source] = {
+            'func': func,
+            'batchSize': batchSize,
+            'decoder': decoder,
+            'claimCheck': claimCheck
+        }
+
+    def route(self, source, **kwargs):
+        """Decorator form of register, e.g. @router.route('sqs')"""
+        def decorator(func):
+            self.register(source, func, **kwargs)
+            return func
+        return decorator
+
+    def hasRoute(self, source):
+        return source in self.routes
+
+    def dispatch(self, event, context, source=None):
+        """Decodes the records in an event and passes them to the handler
+        registered for the event's source.
+
+        Arguments:
+            event {dict} -- The event that invoked the function
+            context {LambdaContext} -- The invocation context
+
+        Keyword Arguments:
+            source {string} -- The previously classified source of the event.
+            If None the event is classified here (default: {None})
+
+        Raises:
+            UnroutableEvent: The event source was not recognized or no handler
+            has been registered for it
+
+        Returns:
+            list|object -- The results of each call to the registered handler,
+            or for API Gateway and scheduled events the result of the single
+            call
+        """
+        if source is None:
+            source = classifyEvent(event)
+
+        if source not in self.routes:
+            logger.error('No route for event source {}'.format(source))
+            raise UnroutableEvent(
+                'No handler registered for {} events'.format(source), event
+            )
+
+        route = self.routes[source]
+        logger.debug('Dispatching {} event'.format(source))
+
+        if source in SINGLE_EVENT_SOURCES:
+            payload = event
+            if route['decoder'] is not None:
+                payload = route['decoder'](event)
+            return route['func'](payload, context)
+
+        records = event['Records']
+        payloads = records
+        if route['decoder'] is not None:
+            payloads = map(route['decoder'], records)
+        if route['claimCheck']:
+            payloads = expandRecords(payloads)
+
+        func = route['func']
+        batchSize = route['batchSize']
+
+        if batchSize == 1:
+            return [func(payload, context) for payload in payloads]
+
+        if batchSize is None:
+            return [func(list(payloads), context)]
+
+        results = []
+        payloads = iter(payloads)
+        batch = list(islice(payloads, batchSize))
+        while batch:
+            results.append(func(batch, context))
+            batch = list(islice(payloads, batchSize))
+
+        return results
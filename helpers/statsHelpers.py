@@ -0,0 +1,244 @@
+from functools import wraps
+import os
+import time
+
+from helpers.logHelpers import createLog
+from helpers.clientHelpers import createAWSClient
+from helpers.codecHelpers import loads, dumps, DecodeError
+from helpers.routerHelpers import classifyEvent
+
+logger = createLog('statsHelpers')
+
+DEFAULT_STATS_FILE = '/tmp/invocation_stats.jsonl'
+
+# In a deployed function stats are written to the logs under this key, as a
+# file in the container's /tmp could never be read back by `make tune`
+STATS_KEY = 'invocationStats'
+
+# The store keeps the most recent MAX_ENTRIES invocations. It is only trimmed
+# every TRIM_INTERVAL writes to keep the cost of recording low
+MAX_ENTRIES = 5000
+TRIM_INTERVAL = 500
+
+state = {'writes': 0}
+
+
+def statsFile():
+    """Returns the store file stats are recorded to, or None when running in
+    Lambda without STATS_FILE set, in which case stats are logged instead"""
+    path = os.environ.get('STATS_FILE', None)
+    if path:
+        return path
+    if os.environ.get('AWS_LAMBDA_FUNCTION_NAME', None):
+        return None
+    return DEFAULT_STATS_FILE
+
+
+def iteratorAge(event, now):
+    """Calculates the age in milliseconds of the oldest record in the batch,
+    from the arrival timestamps included by stream and queue sources.
+
+    Arguments:
+        event {dict} -- The event that invoked the function
+        now {float} -- The current time in seconds
+
+    Returns:
+        float|None -- The age of the oldest record, or None if the records
+        carry no arrival timestamp
+    """
+    arrivals = []
+    for record in eventRecords(event):
+        if 'kinesis' in record:
+            arrival = record['kinesis'].get('approximateArrivalTimestamp')
+        elif 'dynamodb' in record:
+            arrival = record['dynamodb'].get('ApproximateCreationDateTime')
+        elif 'attributes' in record:
+            arrival = record['attributes'].get('SentTimestamp')
+            arrival = int(arrival) / 1000 if arrival else None
+        else:
+            arrival = None
+
+        if arrival is not None:
+            arrivals.append(float(arrival))
+
+    if len(arrivals) < 1:
+        return None
+
+    return max(now - min(arrivals), 0) * 1000
+
+
+def eventRecords(event):
+    if not isinstance(event, dict):
+        return []
+    return event.get('Records', None) or []
+
+
+def recordInvocation(stats, path=None):
+    """Appends the stats for one invocation to the rolling store, or when
+    running in Lambda writes them to the logs, see statsFile.
+
+    Arguments:
+        stats {dict} -- The invocation stats
+
+    Keyword Arguments:
+        path {string} -- The store file. If None the STATS_FILE environment
+        variable or DEFAULT_STATS_FILE is used (default: {None})
+    """
+    path = path or statsFile()
+    if path is None:
+        # Printed directly so that the line is valid JSON without the
+        # logger's prefix and can be matched by a CloudWatch filter pattern
+        print(dumps({STATS_KEY: stats}))
+        return
+
+    with open(path, 'a') as store:
+        store.write(dumps(stats) + '\n')
+
+    state['writes'] += 1
+    if state['writes'] % TRIM_INTERVAL == 0:
+        trimStats(path)
+
+
+def trimStats(path, maxEntries=MAX_ENTRIES):
+    with open(path) as store:
+        lines = store.readlines()
+    if len(lines) > maxEntries:
+        with open(path, 'w') as store:
+            store.writelines(lines[-maxEntries:])
+
+
+def loadStats(path=None, env=None):
+    """Reads the recorded invocation stats.
+
+    Keyword Arguments:
+        path {string} -- The store file (default: {None})
+        env {string} -- Only return stats recorded in this environment
+        (default: {None})
+
+    Returns:
+        list -- The stats for each recorded invocation, oldest first
+    """
+    path = path or statsFile()
+    try:
+        with open(path) as store:
+            stats = [loads(line) for line in store if line.strip()]
+    except FileNotFoundError:
+        logger.warning('No invocation stats found at {}'.format(path))
+        return []
+
+    return filterEnv(stats, env)
+
+
+def loadLoggedStats(functionName, hours=24, env=None, client=None):
+    """Reads the invocation stats a deployed function has written to its
+    CloudWatch log group.
+
+    Arguments:
+        functionName {string} -- The name of the Lambda function
+
+    Keyword Arguments:
+        hours {float} -- How far back to read the logs (default: {24})
+        env {string} -- Only return stats recorded in this environment
+        (default: {None})
+        client {boto3.client} -- A CloudWatch Logs client (default: {None})
+
+    Returns:
+        list -- The stats for each logged invocation, oldest first
+    """
+    if client is None:
+        client = createAWSClient('logs')
+
+    paginator = client.get_paginator('filter_log_events')
+    pages = paginator.paginate(
+        logGroupName='/aws/lambda/{}'.format(functionName),
+        startTime=int((time.time() - hours * 3600) * 1000),
+        filterPattern='{{ $.{}.duration = * }}'.format(STATS_KEY)
+    )
+
+    stats = []
+    for page in pages:
+        for logEvent in page['events']:
+            try:
+                stats.append(loads(logEvent['message'])[STATS_KEY])
+            except (DecodeError, KeyError, TypeError):
+                continue
+
+    if len(stats) < 1:
+        logger.warning('No invocation stats logged by {}'.format(
+            functionName
+        ))
+
+    stats.sort(key=lambda s: s.get('timestamp', 0))
+    return filterEnv(stats, env)
+
+
+def filterEnv(stats, env):
+    if env is None:
+        return stats
+    return [s for s in stats if s.get('env', None) in (env, None)]
+
+
+def recordStats(func):
+    """Decorates a handler to record the batch size, duration, outcome and
+    iterator age of each invocation. Recording is enabled by setting the
+    RECORD_STATS environment variable, otherwise the handler is returned
+    unchanged. Stats are written to STATS_FILE, or DEFAULT_STATS_FILE when
+    run locally, and to the function's logs when deployed.
+    """
+    if not os.environ.get('RECORD_STATS', None):
+        return func
+
+    @wraps(func)
+    def wrapper(event, context):
+        start = time.time()
+        failed = False
+        try:
+            return func(event, context)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Recording stats must never change the result of the invocation
+            try:
+                recordInvocation(
+                    buildStats(event, context, start, time.time(), failed)
+                )
+            except Exception as err:
+                logger.warning('Unable to record invocation stats')
+                logger.debug(err)
+
+    return wrapper
+
+
+def buildStats(event, context, start, end, failed):
+    """Collects the stats for one invocation.
+
+    Arguments:
+        event {dict} -- The event that invoked the function
+        context {LambdaContext} -- The invocation context
+        start {float} -- The start of the invocation in seconds
+        end {float} -- The end of the invocation in seconds
+        failed {bool} -- Whether the handler raised an exception
+
+    Returns:
+        dict -- The invocation stats
+    """
+    records = eventRecords(event)
+    stats = {
+        'timestamp': start,
+        'env': os.environ.get('ENV', None),
+        'source': classifyEvent(event),
+        # Identifies the mapping when several share a source type
+        'sourceArn': records[0].get('eventSourceARN', None)
+        if records and isinstance(records[0], dict) else None,
+        'batchSize': len(records),
+        'duration': (end - start) * 1000,
+        'failed': failed,
+        'iteratorAge': iteratorAge(event, start)
+    }
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        stats['timeout'] = (
+            context.get_remaining_time_in_millis() + stats['duration']
+        )
+
+    return stats
@@ -0,0 +1,66 @@
+from base64 import b64decode, b64encode
+import json
+import sys
+import timeit
+
+from helpers.codecHelpers import CODECS, PREFERENCE, selectCodec
+
+
+def sampleRecord():
+    """Produces a Kinesis-style record with a base64 encoded JSON body,
+    approximating a typical payload received by the handler.
+    """
+    body = {
+        'id': 'b1234567',
+        'type': 'bib',
+        'updatedDate': '2019-01-01T00:00:00Z',
+        'fields': [
+            {'tag': str(i), 'content': 'x' * 40, 'subfields': list(range(5))}
+            for i in range(20)
+        ]
+    }
+    return {
+        'kinesis': {
+            'data': b64encode(json.dumps(body).encode('utf-8')).decode('utf-8')
+        }
+    }
+
+
+def main():
+    """Measures the per-record cost of decoding and encoding a record body
+    with each installed JSON codec and reports the saving over stdlib json.
+    Invoked with `make benchmark-codec`, takes an optional record count."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    record = sampleRecord()
+    payload = memoryview(b64decode(record['kinesis']['data']))
+    decoded = json.loads(payload.tobytes())
+
+    results = {}
+    for name in PREFERENCE:
+        if CODECS[name][0] is None:
+            print('{:8} not installed'.format(name))
+            continue
+
+        _, loads, dumps = selectCodec(name)
+        loadTime = timeit.timeit(lambda: loads(payload), number=count)
+        dumpTime = timeit.timeit(lambda: dumps(decoded), number=count)
+        results[name] = (loadTime / count, dumpTime / count)
+
+    baseLoad, baseDump = results['json']
+    print('{} records of {} bytes'.format(count, len(payload)))
+    for name, (loadTime, dumpTime) in results.items():
+        print((
+            '{:8} loads {:8.2f}us/record ({:5.1f}% saved)  '
+            'dumps {:8.2f}us/record ({:5.1f}% saved)'
+        ).format(
+            name,
+            loadTime * 1e6,
+            (1 - loadTime / baseLoad) * 100,
+            dumpTime * 1e6,
+            (1 - dumpTime / baseDump) * 100
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,34 @@
+from base64 import b64encode
+import glob
+from hashlib import sha256
+from importlib.util import cache_from_source
+from io import BytesIO
+import py_compile
+import re
 import subprocess
 import sys
 import os
+import tempfile
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
 
 from helpers.logHelpers import createLog
-from helpers.errorHelpers import InvalidExecutionType
-from helpers.clientHelpers import createEventMapping
-from helpers.configHelpers import setEnvVars
+from helpers.errorHelpers import InvalidExecutionType, BuildFailed
+from helpers.clientHelpers import createAWSClient, createEventMapping
+from helpers.configHelpers import setEnvVars, loadEnvVars
 
 logger = createLog('runScripts')
 
+# Fixed timestamp given to every entry in the normalized deployment package
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Hash-based .pyc files, which do not depend on the build time, were added in
+# Python 3.7. Packages built with 3.6 are deployed without bytecode
+HASH_PYC = sys.version_info >= (3, 7)
+
+# Matches the ${VAR} syntax python-lambda uses to read environment variable
+# values from the deploying environment
+envValueRegex = re.compile(r'^\${(?P<envKey>\w+)*}$')
+
 
 def main():
     """Invoked by the makefile's arguments, controls the overall execution of
@@ -43,19 +63,279 @@ def deployFunc(runType):
     """Deploys the current Lambda function to the environment specificied
     in the current configuration file.
 
+    If the function already exists the package is built locally and its
+    SHA-256 compared to the deployed CodeSha256, and the merged configuration
+    compared to the deployed configuration. Only the code upload and/or
+    configuration update that is actually needed is sent. Set FORCE_DEPLOY
+    to always run a full `lambda deploy`.
+
     Arguments:
         runType {string} -- The environment to deploy the function to. Should
         be one of [local|development|qa|production]
     """
     logger.info('Deploying lambda to {} environment'.format(runType))
-    runProcess(runType, [
-        'deploy',
-        '--config-file',
-        'run_config.yaml',
+
+    configDict = loadEnvVars(runType)
+    functionName = configDict['function_name']
+    lambdaClient = createAWSClient('lambda', configDict)
+
+    deployed = None
+    if not os.environ.get('FORCE_DEPLOY', None):
+        try:
+            deployed = lambdaClient.get_function_configuration(
+                FunctionName=functionName
+            )
+        except lambdaClient.exceptions.ResourceNotFoundException:
+            logger.info('Function does not exist yet')
+
+    if deployed is None:
+        logger.info('Running full deployment of function')
+        runProcess(runType, [
+            'deploy',
+            '--config-file',
+            'run_config.yaml',
+            '--requirements',
+            'requirements.txt'
+        ])
+        createEventMapping(runType)
+        return
+
+    artifact = normalizeArtifact(buildArtifact(runType, configDict))
+    codeSha = b64encode(sha256(artifact).digest()).decode('utf-8')
+
+    if codeSha != deployed['CodeSha256']:
+        logger.info('Uploading changed code for {}'.format(functionName))
+        lambdaClient.update_function_code(
+            FunctionName=functionName,
+            ZipFile=artifact,
+            Publish=True
+        )
+        # Configuration cannot be updated while the code update is applied
+        lambdaClient.get_waiter('function_updated').wait(
+            FunctionName=functionName
+        )
+    else:
+        logger.info('Code unchanged, skipping upload')
+
+    configUpdate = diffFunctionConfig(configDict, deployed)
+    if configUpdate:
+        logger.info('Updating configuration: {}'.format(
+            ', '.join(sorted(configUpdate.keys()))
+        ))
+        lambdaClient.update_function_configuration(
+            FunctionName=functionName,
+            **configUpdate
+        )
+    else:
+        logger.info('Configuration unchanged, skipping update')
+
+    createEventMapping(runType)
+
+
+def buildArtifact(runType, configDict):
+    """Builds the deployment package with python-lambda and returns its path.
+
+    Arguments:
+        runType {string} -- The environment to build the function for
+        configDict {dict} -- The merged configuration for the environment
+
+    Raises:
+        BuildFailed: The build exited with an error or did not create a zip
+
+    Returns:
+        string -- The path to the newly built zip file
+    """
+    distDir = configDict.get('dist_directory', None) or 'dist'
+    pattern = os.path.join(distDir, '*.zip')
+    previous = {path: os.path.getmtime(path) for path in glob.glob(pattern)}
+
+    result = runProcess(runType, [
+        'build',
         '--requirements',
-        'requirements.txt'
+        'requirements.txt',
+        '--config-file',
+        'run_config.yaml'
     ])
-    createEventMapping(runType)
+    if result.returncode != 0:
+        logger.error('Build exited with status {}'.format(result.returncode))
+        raise BuildFailed('lambda build failed, nothing was deployed')
+
+    # Only a zip written by this build may be deployed, never an older one
+    built = {
+        path: os.path.getmtime(path) for path in glob.glob(pattern)
+        if previous.get(path, None) != os.path.getmtime(path)
+    }
+    if len(built) < 1:
+        logger.error('No package found in {}'.format(distDir))
+        raise BuildFailed('lambda build did not create a package')
+
+    return max(built, key=built.get)
+
+
+def normalizeArtifact(path):
+    """Repacks a deployment package so that identical code always produces an
+    identical zip, and therefore an identical SHA-256. Entries are sorted and
+    given a fixed timestamp. The .pyc files written by pip embed the install
+    time, so they are replaced with bytecode recompiled from each source file,
+    see compileSource. The Lambda filesystem is read-only, so without bytecode
+    in the package every cold start would recompile every imported module.
+    On Python 3.6 bytecode cannot be made deterministic and is dropped.
+
+    Arguments:
+        path {string} -- The path to the zip built by python-lambda
+
+    Returns:
+        bytes -- The normalized zip file
+    """
+    entries = {}
+    with ZipFile(path) as source:
+        for name in source.namelist():
+            if name.endswith('.pyc') or name.endswith('/'):
+                continue
+            entries[name] = (
+                source.getinfo(name).external_attr, source.read(name)
+            )
+
+    if HASH_PYC:
+        with tempfile.TemporaryDirectory() as buildDir:
+            for name, (attr, data) in list(entries.items()):
+                if not name.endswith('.py'):
+                    continue
+                bytecode = compileSource(buildDir, name, data)
+                if bytecode is not None:
+                    entries[cache_from_source(name)] = (attr, bytecode)
+    else:
+        logger.warning('Python 3.6 build, deploying without bytecode')
+
+    output = BytesIO()
+    with ZipFile(output, 'w', ZIP_DEFLATED) as dest:
+        for name in sorted(entries.keys()):
+            attr, data = entries[name]
+            info = ZipInfo(name, date_time=ZIP_EPOCH)
+            info.external_attr = attr
+            info.compress_type = ZIP_DEFLATED
+            dest.writestr(info, data)
+
+    return output.getvalue()
+
+
+def compileSource(buildDir, name, data):
+    """Compiles a source file from the package to deterministic bytecode. The
+    .pyc is validated by a hash of its source rather than a timestamp, and as
+    the deployed source never changes that hash is not checked on import. The
+    path recorded in the bytecode is the file's path within the package.
+
+    Bytecode is only used by the same Python version it was compiled with, so
+    the package should be built with the runtime's version of Python.
+
+    Arguments:
+        buildDir {string} -- A directory to compile the file in
+        name {string} -- The path of the file within the package
+        data {bytes} -- The contents of the source file
+
+    Returns:
+        bytes|None -- The compiled bytecode, or None if the file could not be
+        compiled (e.g. a Python 2 only module shipped in a dependency)
+    """
+    sourcePath = os.path.join(buildDir, name)
+    os.makedirs(os.path.dirname(sourcePath), exist_ok=True)
+    with open(sourcePath, 'wb') as sourceFile:
+        sourceFile.write(data)
+
+    try:
+        bytecodePath = py_compile.compile(
+            sourcePath,
+            dfile=name,
+            doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+        )
+    except py_compile.PyCompileError:
+        logger.debug('Unable to compile {}'.format(name))
+        return None
+
+    with open(bytecodePath, 'rb') as bytecodeFile:
+        return bytecodeFile.read()
+
+
+def diffFunctionConfig(configDict, deployed):
+    """Compares the merged configuration with the deployed function's
+    configuration, covering the same settings python-lambda deploys.
+
+    Arguments:
+        configDict {dict} -- The merged configuration from loadEnvVars
+        deployed {dict} -- The response from get_function_configuration
+
+    Returns:
+        dict -- Keyword arguments for update_function_configuration containing
+        only the settings that differ, empty if nothing has changed
+    """
+    role = configDict.get('role', None) or 'lambda_basic_execution'
+    if not role.startswith('arn:'):
+        # Reuse the deployed role's partition and account rather than making
+        # an additional call to STS
+        role = '{}:role/{}'.format(deployed['Role'].split(':role/')[0], role)
+
+    desired = {
+        'Handler': configDict.get('handler', None),
+        'Runtime': configDict.get('runtime', None),
+        'Description': configDict.get('description', None) or '',
+        'Timeout': configDict.get('timeout', 15),
+        'MemorySize': configDict.get('memory_size', 512),
+        'Role': role,
+        'VpcConfig': {
+            'SubnetIds': configDict.get('subnet_ids', None) or [],
+            'SecurityGroupIds': configDict.get('security_group_ids', None)
+            or []
+        }
+    }
+
+    if 'environment_variables' in configDict:
+        desired['Environment'] = {'Variables': {
+            key: str(expandEnvValue(value))
+            for key, value in configDict['environment_variables'].items()
+        }}
+
+    deployedVpc = deployed.get('VpcConfig', None) or {}
+    current = {
+        'Handler': deployed.get('Handler', None),
+        'Runtime': deployed.get('Runtime', None),
+        'Description': deployed.get('Description', None) or '',
+        'Timeout': deployed.get('Timeout', None),
+        'MemorySize': deployed.get('MemorySize', None),
+        'Role': deployed.get('Role', None),
+        'VpcConfig': {
+            'SubnetIds': deployedVpc.get('SubnetIds', []),
+            'SecurityGroupIds': deployedVpc.get('SecurityGroupIds', [])
+        },
+        'Environment': {'Variables': (
+            deployed.get('Environment', None) or {}
+        ).get('Variables', {})}
+    }
+
+    update = {}
+    for key, value in desired.items():
+        if key == 'VpcConfig':
+            changed = any(
+                sorted(value[ids]) != sorted(current[key][ids])
+                for ids in value
+            )
+        else:
+            changed = value != current[key]
+
+        if changed:
+            update[key] = value
+
+    return update
+
+
+def expandEnvValue(value):
+    """Resolves a ${VAR} config value from the deploying environment, as
+    python-lambda does when it sets the function's environment variables"""
+    if isinstance(value, str):
+        match = envValueRegex.search(value)
+        if match is not None:
+            return os.environ.get(match.group('envKey'))
+    return value
 
 
 def buildFunc(runType):
@@ -112,11 +392,14 @@ def runProcess(runType, argList):
         runType {string} -- The current environment to load settings for.
         argList {array} -- An array of command line arguments that dictate
         the specific type of invocation being made to `python-lambda`
+
+    Returns:
+        CompletedProcess -- The result of the command
     """
     setEnvVars(runType)  # Creates the run_config.yaml file
     processArgs = ['lambda']
     processArgs.extend(argList)
-    subprocess.run(processArgs)  # Executes the actual command
+    return subprocess.run(processArgs)  # Executes the actual command
 
 
 if __name__ == '__main__':
@@ -0,0 +1,305 @@
+import argparse
+from base64 import b64encode
+import sqlite3
+import threading
+import time
+
+from helpers.logHelpers import createLog
+from helpers.codecHelpers import loads, dumps
+
+logger = createLog('localPoller')
+
+# A MaximumRetryAttempts of -1 (the AWS default for streams) retries until the
+# record expires, which would never terminate locally
+DEFAULT_RETRIES = 2
+
+
+class LocalQueue(object):
+    """SQLite backed stand-in for a queue or stream. The queue is emptied when
+    it is opened. Use a file path to inspect the state of each record after a
+    run, otherwise the queue is kept in memory.
+    """
+    def __init__(self, path=':memory:'):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute((
+            'CREATE TABLE IF NOT EXISTS records ('
+            'id INTEGER PRIMARY KEY, partition INTEGER, body TEXT, '
+            'enqueued REAL, state TEXT)'
+        ))
+        self.conn.execute('DELETE FROM records')
+        self.conn.commit()
+
+    def put(self, bodies, partitions=1):
+        with self.lock:
+            cursor = self.conn.execute('SELECT COUNT(*) FROM records')
+            offset = cursor.fetchone()[0]
+            now = time.time()
+            self.conn.executemany(
+                'INSERT INTO records VALUES (NULL, ?, ?, ?, ?)',
+                [
+                    ((offset + i) % partitions, body, now, 'ready')
+                    for i, body in enumerate(bodies)
+                ]
+            )
+            self.conn.commit()
+
+    def claim(self, partition, limit):
+        """Marks up to limit ready records in a partition as in flight and
+        returns them as (id, body, enqueued) tuples in order"""
+        if limit < 1:
+            return []
+        with self.lock:
+            rows = self.conn.execute((
+                'SELECT id, body, enqueued FROM records WHERE partition = ? '
+                'AND state = ? ORDER BY id LIMIT ?'
+            ), (partition, 'ready', limit)).fetchall()
+            self.conn.executemany(
+                'UPDATE records SET state = ? WHERE id = ?',
+                [('inflight', row[0]) for row in rows]
+            )
+            self.conn.commit()
+        return rows
+
+    def finish(self, rows, state):
+        with self.lock:
+            self.conn.executemany(
+                'UPDATE records SET state = ? WHERE id = ?',
+                [(state, row[0]) for row in rows]
+            )
+            self.conn.commit()
+
+
+def sourceType(mapping):
+    """Infers the shape of the records to deliver from the mapping's
+    EventSourceArn, defaulting to Kinesis"""
+    arn = mapping.get('EventSourceArn', '')
+    if arn.startswith('arn:aws:sqs'):
+        return 'sqs'
+    if arn.startswith('arn:aws:dynamodb'):
+        return 'dynamodb'
+    return 'kinesis'
+
+
+def buildRecord(source, row):
+    recordId, body, enqueued = row
+    if source == 'sqs':
+        return {
+            'eventSource': 'aws:sqs',
+            'messageId': str(recordId),
+            'body': body
+        }
+    if source == 'dynamodb':
+        return {
+            'eventSource': 'aws:dynamodb',
+            'dynamodb': {'NewImage': loads(body), 'SequenceNumber': recordId}
+        }
+    return {
+        'eventSource': 'aws:kinesis',
+        'kinesis': {
+            'data': b64encode(body.encode('utf-8')).decode('utf-8'),
+            'sequenceNumber': str(recordId),
+            'approximateArrivalTimestamp': enqueued
+        }
+    }
+
+
+class LocalContext(object):
+    """Minimal stand-in for the LambdaContext passed to the handler"""
+    def __init__(self, timeout):
+        self.deadline = time.time() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return int(max(self.deadline - time.time(), 0) * 1000)
+
+
+class LocalPoller(object):
+    """Emulates a Lambda event source mapping against a LocalQueue, honoring
+    BatchSize, MaximumBatchingWindowInSeconds, ParallelizationFactor,
+    MaximumRetryAttempts and BisectBatchOnFunctionError.
+    """
+    def __init__(self, queue, mapping, handler, timeout=30):
+        self.queue = queue
+        self.handler = handler
+        self.timeout = timeout
+        self.source = sourceType(mapping)
+        self.batchSize = mapping.get('BatchSize', 100)
+        self.window = mapping.get('MaximumBatchingWindowInSeconds', 0)
+        self.parallelization = mapping.get('ParallelizationFactor', 1)
+        self.bisect = mapping.get('BisectBatchOnFunctionError', False)
+        self.maxRetries = mapping.get('MaximumRetryAttempts', -1)
+        if self.maxRetries < 0:
+            self.maxRetries = DEFAULT_RETRIES
+
+        self.statsLock = threading.Lock()
+        self.lags = []
+        self.batchSizes = []
+        self.errors = 0
+        self.discarded = 0
+        self.producing = False
+
+    def run(self, bodies, rate=None):
+        """Delivers all of the records to the handler and returns stats for
+        the run.
+
+        Arguments:
+            bodies {list} -- The record bodies to enqueue, as strings
+
+        Keyword Arguments:
+            rate {float} -- Enqueue records at this many per second, to see
+            the effect of the batching window. If None all records are
+            enqueued before polling starts (default: {None})
+
+        Returns:
+            dict -- Records per second, lag and error statistics
+        """
+        start = time.time()
+        workers = [
+            threading.Thread(target=self.poll, args=(partition,))
+            for partition in range(self.parallelization)
+        ]
+
+        self.producing = True
+        if rate is None:
+            self.queue.put(bodies, self.parallelization)
+            self.producing = False
+        else:
+            workers.append(
+                threading.Thread(target=self.produce, args=(bodies, rate))
+            )
+
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return self.report(time.time() - start)
+
+    def produce(self, bodies, rate):
+        for body in bodies:
+            self.queue.put([body], self.parallelization)
+            time.sleep(1 / rate)
+        self.producing = False
+
+    def poll(self, partition):
+        while True:
+            batch = self.nextBatch(partition)
+            if not batch:
+                return
+            self.deliver(batch, 0)
+
+    def nextBatch(self, partition):
+        """Gathers records until the batch is full, the batching window has
+        elapsed or there are no more records to wait for"""
+        batch = []
+        deadline = time.time() + self.window
+        while True:
+            # Read before claiming so that no record can be enqueued between
+            # the final claim and the producer finishing
+            producing = self.producing
+            batch.extend(self.queue.claim(
+                partition, self.batchSize - len(batch)
+            ))
+            if len(batch) >= self.batchSize or not producing:
+                return batch
+            if batch and time.time() >= deadline:
+                return batch
+            time.sleep(0.005)
+
+    def deliver(self, rows, attempt):
+        event = {'Records': [buildRecord(self.source, row) for row in rows]}
+        try:
+            self.handler(event, LocalContext(self.timeout))
+        except Exception as err:
+            logger.debug(err)
+            with self.statsLock:
+                self.errors += 1
+
+            if self.bisect and len(rows) > 1:
+                middle = len(rows) // 2
+                self.deliver(rows[:middle], attempt)
+                self.deliver(rows[middle:], attempt)
+            elif attempt < self.maxRetries:
+                self.deliver(rows, attempt + 1)
+            else:
+                logger.warning('Discarding {} records after {} retries'.format(
+                    len(rows), attempt
+                ))
+                self.queue.finish(rows, 'discarded')
+                with self.statsLock:
+                    self.discarded += len(rows)
+            return
+
+        done = time.time()
+        self.queue.finish(rows, 'done')
+        with self.statsLock:
+            self.batchSizes.append(len(rows))
+            self.lags.extend(done - row[2] for row in rows)
+
+    def report(self, elapsed):
+        lags = sorted(self.lags)
+        processed = len(lags)
+        return {
+            'batchSize': self.batchSize,
+            'window': self.window,
+            'parallelization': self.parallelization,
+            'processed': processed,
+            'discarded': self.discarded,
+            'errors': self.errors,
+            'invocations': len(self.batchSizes),
+            'recordsPerSecond': processed / elapsed if elapsed else 0,
+            'meanLag': sum(lags) / processed if processed else 0,
+            'p95Lag': lags[int(processed * 0.95) - 1] if processed else 0,
+            'maxLag': lags[-1] if processed else 0
+        }
+
+
+def loadBodies(path):
+    """Reads record bodies from a JSON lines file, one record per line"""
+    with open(path) as records:
+        return [line.strip() for line in records if line.strip()]
+
+
+def loadMappings(path):
+    with open(path) as sources:
+        return loads(sources.read())['EventSourceMappings']
+
+
+def main():
+    """Runs each event source mapping in an event_sources JSON file against
+    the local handler and prints throughput and lag for each configuration.
+    Invoked with `make local-poll RECORDS=[file] ENV=[environment]`"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('records', help='JSON lines file of record bodies')
+    parser.add_argument('--env', default='sample')
+    parser.add_argument('--db', default=':memory:')
+    parser.add_argument('--rate', type=float, default=None)
+    parser.add_argument('--timeout', type=int, default=30)
+    parser.add_argument(
+        '--batch-sizes', default=None,
+        help='Comma separated BatchSize values to compare for each mapping'
+    )
+    args = parser.parse_args()
+
+    from service import handler
+
+    bodies = loadBodies(args.records)
+    mappings = loadMappings('config/event_sources_{}.json'.format(args.env))
+
+    configs = []
+    for mapping in mappings:
+        if args.batch_sizes is None:
+            configs.append(mapping)
+            continue
+        for size in args.batch_sizes.split(','):
+            configs.append({**mapping, 'BatchSize': int(size)})
+
+    for mapping in configs:
+        poller = LocalPoller(
+            LocalQueue(args.db), mapping, handler, args.timeout
+        )
+        print(dumps(poller.run(bodies, rate=args.rate)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import math
+
+from helpers.logHelpers import createLog
+from helpers.codecHelpers import loads, dumps
+from helpers.configHelpers import loadEnvVars
+from helpers.statsHelpers import loadStats, loadLoggedStats
+from scripts.localPoller import sourceType
+
+logger = createLog('tuneMappings')
+
+# Largest BatchSize accepted for each source. SQS batches above
+# SQS_UNBATCHED_MAX require a batching window of at least one second
+SOURCE_LIMITS = {'kinesis': 10000, 'dynamodb': 10000, 'sqs': 10000}
+SQS_UNBATCHED_MAX = 10
+
+STREAM_SOURCES = ('kinesis', 'dynamodb')
+MAX_PARALLELIZATION = 10
+MAX_WINDOW = 300
+
+# Batches are sized so the predicted duration uses at most this share of the
+# function timeout, leaving headroom for slow batches
+TIMEOUT_FRACTION = 0.5
+
+FAILURE_LIMIT = 0.05
+ITERATOR_AGE_LIMIT = 60000
+
+
+def fitModel(stats):
+    """Fits duration = overhead + perRecord * batchSize to the successful
+    invocations by least squares.
+
+    Arguments:
+        stats {list} -- Recorded invocation stats
+
+    Returns:
+        tuple|None -- The fixed overhead and per-record cost in milliseconds,
+        or None if there are no successful invocations to fit
+    """
+    points = [
+        (s['batchSize'], s['duration']) for s in stats
+        if not s['failed'] and s['batchSize'] > 0
+    ]
+    if len(points) < 1:
+        return None
+
+    meanX = sum(x for x, _ in points) / len(points)
+    meanY = sum(y for _, y in points) / len(points)
+    varX = sum((x - meanX) ** 2 for x, _ in points)
+
+    if varX == 0:
+        # Only one batch size observed, attribute the full cost to records
+        return 0.0, meanY / meanX
+
+    slope = sum((x - meanX) * (y - meanY) for x, y in points) / varX
+    if slope <= 0:
+        return meanY, 0.0
+
+    return max(meanY - slope * meanX, 0.0), slope
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(math.ceil(len(values) * fraction)) - 1, 0)]
+
+
+def arrivalRate(stats):
+    """Estimates records per second arriving at the source over the period
+    covered by the stats"""
+    if len(stats) < 2:
+        return None
+    span = stats[-1]['timestamp'] - stats[0]['timestamp']
+    if span <= 0:
+        return None
+    return sum(s['batchSize'] for s in stats) / span
+
+
+def recommend(stats, mapping, timeout, maxLatency=None):
+    """Recommends event source mapping settings from recorded stats.
+
+    Arguments:
+        stats {list} -- Recorded invocation stats for the mapping's source
+        mapping {dict} -- The current event source mapping
+        timeout {float} -- The function timeout in milliseconds
+
+    Keyword Arguments:
+        maxLatency {float} -- An upper bound in milliseconds on the time a
+        record may wait in a batch and be processed (default: {None})
+
+    Returns:
+        dict -- The recommended settings, the reasons for them and the fitted
+        model. Settings are empty if there is not enough data
+    """
+    source = sourceType(mapping)
+    result = {
+        'EventSourceArn': mapping.get('EventSourceArn', None),
+        'invocations': len(stats),
+        'current': {
+            key: mapping[key] for key in [
+                'BatchSize',
+                'MaximumBatchingWindowInSeconds',
+                'ParallelizationFactor',
+                'BisectBatchOnFunctionError'
+            ] if key in mapping
+        },
+        'recommended': {},
+        'reasons': []
+    }
+
+    model = fitModel(stats)
+    if model is None:
+        result['reasons'].append('No successful invocations recorded')
+        return result
+
+    overhead, perRecord = model
+    result['model'] = {'overheadMs': overhead, 'perRecordMs': perRecord}
+    recommended = result['recommended']
+    reasons = result['reasons']
+
+    budget = timeout * TIMEOUT_FRACTION
+    if maxLatency is not None:
+        budget = min(budget, maxLatency)
+
+    limit = SOURCE_LIMITS.get(source, SQS_UNBATCHED_MAX)
+    if perRecord > 0:
+        batchSize = int((budget - overhead) / perRecord)
+    else:
+        batchSize = limit
+    batchSize = min(max(batchSize, 1), limit)
+    reasons.append(
+        'Largest batch predicted to finish within {:.0f}ms'.format(budget)
+    )
+
+    failureRate = sum(1 for s in stats if s['failed']) / len(stats)
+    if failureRate > FAILURE_LIMIT:
+        batchSize = max(batchSize // 2, 1)
+        reasons.append('Halved batch for {:.0%} failure rate'.format(
+            failureRate
+        ))
+        if source in STREAM_SOURCES:
+            recommended['BisectBatchOnFunctionError'] = True
+
+    recommended['BatchSize'] = batchSize
+    duration = overhead + perRecord * batchSize
+    throughput = batchSize / (duration / 1000) if duration > 0 else None
+
+    rate = arrivalRate(stats)
+    currentBatch = mapping.get('BatchSize', None) or batchSize
+    fill = sum(s['batchSize'] for s in stats) / len(stats) / currentBatch
+
+    window = 0
+    if rate and fill < 0.5:
+        # Batches are arriving mostly empty, wait long enough to fill them
+        window = int(math.ceil(batchSize / rate))
+        if maxLatency is not None:
+            window = min(window, int((maxLatency - duration) / 1000))
+        window = min(max(window, 0), MAX_WINDOW)
+        reasons.append('Batches are {:.0%} full at {:.1f} records/s'.format(
+            fill, rate
+        ))
+    if source == 'sqs' and batchSize > SQS_UNBATCHED_MAX:
+        window = max(window, 1)
+    recommended['MaximumBatchingWindowInSeconds'] = window
+
+    if source in STREAM_SOURCES:
+        factor = mapping.get('ParallelizationFactor', 1)
+        if rate and throughput:
+            factor = int(math.ceil(rate / throughput))
+        ages = [
+            s['iteratorAge'] for s in stats
+            if s.get('iteratorAge', None) is not None
+        ]
+        if ages and percentile(ages, 0.95) > ITERATOR_AGE_LIMIT:
+            factor = max(factor, mapping.get('ParallelizationFactor', 1) + 1)
+            reasons.append('p95 iterator age above {}ms'.format(
+                ITERATOR_AGE_LIMIT
+            ))
+        recommended['ParallelizationFactor'] = min(
+            max(factor, 1), MAX_PARALLELIZATION
+        )
+
+    return result
+
+
+def sourceStats(stats, mapping):
+    """Selects the stats recorded for an event source mapping, matching on
+    the source ARN of each batch. Stats without an ARN are matched on source
+    type, so several mappings of the same type share them.
+
+    Arguments:
+        stats {list} -- Recorded invocation stats
+        mapping {dict} -- The event source mapping
+
+    Returns:
+        list -- The stats for the mapping
+    """
+    arn = mapping.get('EventSourceArn', None)
+    source = sourceType(mapping)
+    return [
+        s for s in stats
+        if s.get('sourceArn', None) == arn
+        or (
+            s.get('sourceArn', None) is None
+            and s.get('source', None) in (source, None)
+        )
+    ]
+
+
+def writeRecommendations(runType, results):
+    """Writes recommended settings back into the event source JSON file that
+    createEventMapping deploys, matching mappings by EventSourceArn.
+
+    Arguments:
+        runType {string} -- The environment of the event source file
+        results {list} -- The output of recommend for each mapping
+    """
+    path = 'config/event_sources_{}.json'.format(runType)
+    with open(path) as sources:
+        eventMappings = loads(sources.read())
+
+    byArn = {r['EventSourceArn']: r['recommended'] for r in results}
+    for mapping in eventMappings['EventSourceMappings']:
+        mapping.update(byArn.get(mapping.get('EventSourceArn', None), {}))
+
+    with open(path, 'w') as sources:
+        sources.write(dumps(eventMappings, pretty=True) + '\n')
+
+    logger.info('Wrote recommendations to {}'.format(path))
+
+
+def main():
+    """Recommends BatchSize, batching window and parallelization factor for
+    each event source mapping of an environment from recorded invocation
+    stats. Invoked with `make tune ENV=[environment]`"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('env')
+    parser.add_argument('--stats', default=None, help='Stats file to read')
+    parser.add_argument(
+        '--logs', type=float, default=None, metavar='HOURS',
+        help='Read stats logged by the deployed function over the last HOURS'
+    )
+    parser.add_argument(
+        '--max-latency', type=float, default=None,
+        help='Upper bound in seconds on batching plus processing time'
+    )
+    parser.add_argument(
+        '--write', action='store_true',
+        help='Write recommendations to config/event_sources_ENV.json'
+    )
+    args = parser.parse_args()
+
+    configDict = loadEnvVars(args.env)
+    if args.logs is not None:
+        stats = loadLoggedStats(
+            configDict['function_name'], args.logs, args.env
+        )
+    else:
+        stats = loadStats(args.stats, args.env)
+    timeout = configDict.get('timeout', 30) * 1000
+    maxLatency = args.max_latency * 1000 if args.max_latency else None
+
+    with open('config/event_sources_{}.json'.format(args.env)) as sources:
+        mappings = loads(sources.read())['EventSourceMappings']
+
+    results = [
+        recommend(sourceStats(stats, mapping), mapping, timeout, maxLatency)
+        for mapping in mappings
+    ]
+    print(dumps(results, pretty=True))
+
+    if args.write:
+        writeRecommendations(args.env, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,34 @@
 from helpers.logHelpers import createLog
+from helpers.codecHelpers import LazyJSON
+from helpers.prewarmHelpers import prewarm
+from helpers.routerHelpers import EventRouter, classifyEvent
+from helpers.statsHelpers import recordStats
 
 # Logger can be passed name of current module
 # Can also be instantiated on a class/method basis using dot notation
 logger = createLog('handler')
 
+# Process pools for CPU-bound transforms fork their workers, so they must be
+# created here, before prewarm() or anything else starts a thread:
+#
+# pool = getPool(transform)
 
+# Create clients, open connections and decrypt secrets during the init phase
+# as configured in the prewarm block of config.yaml. These can be retrieved in
+# the handler with getClient/getSecret from helpers.prewarmHelpers
+prewarm()
+
+# Register a handler for each event source this function is triggered by,
+# each route can set its own batchSize, decoder and claimCheck options:
+#
+# @router.route('sqs', batchSize=10)
+# def processMessages(messages, context):
+#     ...
+router = EventRouter()
+
+
+# Set RECORD_STATS to record per-invocation stats for `make tune`
+@recordStats
 def handler(event, context):
     """The central handler function called when the Lambda function is invoked.
 
@@ -20,7 +44,12 @@ def handler(event, context):
     """
     logger.info('Starting Lambda Execution')
 
-    logger.debug(event)
+    # Only encoded if debug logging is enabled
+    logger.debug(LazyJSON(event))
+
+    source = classifyEvent(event)
+    if router.hasRoute(source):
+        return router.dispatch(event, context, source=source)
 
     # Method to be invoked goes here
     logger.info('Successfully invoked lambda')
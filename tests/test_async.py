@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import logging
+
+from helpers import asyncHelpers
+from helpers.asyncHelpers import (
+    asyncHandler,
+    getLoop,
+    gatherBounded,
+    remainingTime
+)
+
+logging.disable(logging.CRITICAL)
+
+
+def mockContext(remaining):
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = remaining
+    return context
+
+
+class TestAsync(unittest.TestCase):
+
+    def test_handler_result(self):
+        @asyncHandler()
+        async def handler(event, context):
+            await asyncio.sleep(0)
+            return event['test']
+
+        self.assertEqual(handler({'test': 'hello'}, None), 'hello')
+
+    def test_loop_persistent(self):
+        @asyncHandler()
+        async def handler(event, context):
+            return asyncio.get_event_loop()
+
+        first = handler({}, None)
+        self.assertIs(handler({}, None), first)
+        self.assertIs(getLoop(), first)
+
+    def test_loop_recreated_when_closed(self):
+        first = getLoop()
+        first.close()
+        self.assertIsNot(getLoop(), first)
+
+    def test_concurrency_limit(self):
+        counts = {'current': 0, 'max': 0}
+
+        async def call():
+            counts['current'] += 1
+            counts['max'] = max(counts['max'], counts['current'])
+            await asyncio.sleep(0.001)
+            counts['current'] -= 1
+            return True
+
+        @asyncHandler(maxConcurrency=3)
+        async def handler(event, context):
+            return await gatherBounded(*(call() for _ in range(20)))
+
+        self.assertEqual(handler({}, mockContext(10000)), [True] * 20)
+        self.assertEqual(counts['max'], 3)
+        self.assertEqual(asyncHelpers.state['maxConcurrency'], 3)
+
+    def test_deadline_cancels(self):
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        @asyncHandler(margin=0.5)
+        async def handler(event, context):
+            await gatherBounded(slow(), slow())
+
+        with self.assertRaises(asyncio.TimeoutError):
+            handler({}, mockContext(550))
+        self.assertEqual(cancelled, [True, True])
+
+    def test_remaining_time(self):
+        self.assertIsNone(remainingTime(None, 0.5))
+        self.assertEqual(remainingTime(mockContext(3000), 0.5), 2.5)
+        self.assertEqual(remainingTime(mockContext(100), 0.5), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import logging
+import time
+
+from botocore.exceptions import (
+    ClientError,
+    EndpointConnectionError,
+    ParamValidationError
+)
+
+from helpers import breakerHelpers
+from helpers.breakerHelpers import (
+    CircuitBreaker,
+    isFailure,
+    protectClient,
+    breakerMetrics,
+    logBreakerMetrics,
+    CLOSED,
+    OPEN,
+    HALF_OPEN
+)
+from helpers.errorHelpers import CircuitOpen
+
+logging.disable(logging.CRITICAL)
+
+
+def clientError(code, status):
+    return ClientError({
+        'Error': {'Code': code},
+        'ResponseMetadata': {'HTTPStatusCode': status}
+    }, 'TestOperation')
+
+
+def raiser(err):
+    def func():
+        raise err
+    return func
+
+
+class TestBreaker(unittest.TestCase):
+
+    def tearDown(self):
+        breakerHelpers.breakers.clear()
+
+    def test_is_failure(self):
+        self.assertTrue(isFailure(clientError('InternalError', 500)))
+        self.assertTrue(isFailure(clientError('ThrottlingException', 400)))
+        self.assertTrue(isFailure(EndpointConnectionError(endpoint_url='x')))
+        self.assertFalse(isFailure(clientError('NoSuchKey', 404)))
+        self.assertFalse(isFailure(ParamValidationError(report='bad')))
+        self.assertFalse(isFailure(ValueError()))
+
+    def test_opens_on_error_rate(self):
+        breaker = CircuitBreaker('test', minCalls=4, errorThreshold=0.5)
+        breaker.call(lambda: True)
+        breaker.call(lambda: True)
+        for _ in range(2):
+            with self.assertRaises(ClientError):
+                breaker.call(raiser(clientError('InternalError', 500)))
+        self.assertEqual(breaker.state, OPEN)
+
+        func = MagicMock()
+        with self.assertRaises(CircuitOpen):
+            breaker.call(func)
+        func.assert_not_called()
+
+    def test_ignores_request_errors(self):
+        breaker = CircuitBreaker('test', minCalls=2)
+        for _ in range(5):
+            with self.assertRaises(ClientError):
+                breaker.call(raiser(clientError('NoSuchKey', 404)))
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_opens_on_latency(self):
+        breaker = CircuitBreaker(
+            'test', minCalls=2, latencyThreshold=0.01, slowCallThreshold=1
+        )
+        breaker.call(time.sleep, 0.02)
+        breaker.call(time.sleep, 0.02)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_sliding_window(self):
+        breaker = CircuitBreaker('test', minCalls=2, windowSeconds=10)
+        breaker.record(time.time() - 20, True, False)
+        breaker.call(lambda: True)
+        metrics = breaker.metrics()
+        self.assertEqual(metrics['calls'], 1)
+        self.assertEqual(metrics['errorRate'], 0)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_bulkhead(self):
+        breaker = CircuitBreaker('test', maxConcurrent=1)
+        inner = MagicMock()
+
+        def outer():
+            with self.assertRaises(CircuitOpen):
+                breaker.call(inner)
+            return True
+
+        self.assertTrue(breaker.call(outer))
+        inner.assert_not_called()
+        self.assertEqual(breaker.metrics()['rejected'], 1)
+        # The slot is released once the call completes
+        self.assertTrue(breaker.call(lambda: True))
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker('test', minCalls=1, openSeconds=10)
+        with self.assertRaises(ClientError):
+            breaker.call(raiser(clientError('InternalError', 500)))
+        self.assertEqual(breaker.state, OPEN)
+
+        breaker.openedAt = time.time() - 20
+        breaker.before()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.before()
+        breaker.after(False, 0)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_probe_fails(self):
+        breaker = CircuitBreaker('test', minCalls=1, openSeconds=0)
+        with self.assertRaises(ClientError):
+            breaker.call(raiser(clientError('InternalError', 500)))
+        with self.assertRaises(ClientError):
+            breaker.call(raiser(clientError('InternalError', 500)))
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.opened, 2)
+
+    def test_protect_client(self):
+        client = MagicMock()
+        client.meta.service_model.service_name = 's3'
+        client.meta.endpoint_url = 'https://s3.amazonaws.com'
+        client.get_object.return_value = 'object'
+
+        protected = protectClient(client, minCalls=1)
+        self.assertEqual(protected.get_object(Key='test'), 'object')
+        client.get_object.assert_called_once_with(Key='test')
+        self.assertIs(protected.meta, client.meta)
+        self.assertIs(protected.get_paginator, client.get_paginator)
+
+        # Breaker state is shared by all clients for the same endpoint
+        other = protectClient(client)
+        self.assertIs(other.breaker, protected.breaker)
+        self.assertEqual(
+            breakerMetrics()[0]['name'], 's3:https://s3.amazonaws.com'
+        )
+
+    @patch('builtins.print')
+    def test_log_metrics(self, mock_print):
+        breaker = CircuitBreaker('test', minCalls=1)
+        breakerHelpers.breakers['test'] = breaker
+        breaker.rejected = 3
+        logBreakerMetrics()
+        emf = json.loads(mock_print.call_args[0][0])
+        self.assertEqual(emf['Breaker'], 'test')
+        self.assertEqual(emf['State'], 0)
+        self.assertEqual(emf['Rejected'], 3)
+
+        logBreakerMetrics()
+        emf = json.loads(mock_print.call_args[0][0])
+        self.assertEqual(emf['Rejected'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import patch
+from io import BytesIO
+import hashlib
+import json
+
+from botocore.exceptions import ClientError
+
+from helpers.claimCheckHelpers import (
+    parsePointer,
+    streamObject,
+    iterLines,
+    parseJSONLines,
+    parseCSV,
+    expandRecord,
+    expandRecords
+)
+
+
+class FakeS3(object):
+    """Local stand-in for S3 that honors the Range header on get_object"""
+    def __init__(self, objects):
+        self.objects = objects
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        data = self.objects[(Bucket, Key)]
+        self.ranges.append(Range)
+        etag = '"{}"'.format(hashlib.md5(data).hexdigest())
+        if IfMatch is not None and IfMatch != etag:
+            raise ClientError({
+                'Error': {'Code': 'PreconditionFailed'},
+                'ResponseMetadata': {'HTTPStatusCode': 412}
+            }, 'GetObject')
+        start, end = [int(b) for b in Range.replace('bytes=', '').split('-')]
+        if start >= len(data):
+            raise ClientError(
+                {'Error': {'Code': 'InvalidRange'}}, 'GetObject'
+            )
+        body = data[start:end + 1]
+        return {
+            'Body': BytesIO(body),
+            'ContentLength': len(body),
+            'ETag': etag,
+            'ContentRange': 'bytes {}-{}/{}'.format(
+                start, start + len(body) - 1, len(data)
+            )
+        }
+
+
+class TestClaimCheck(unittest.TestCase):
+
+    def test_parse_extended_client_pointer(self):
+        body = json.dumps([
+            'software.amazon.payloadoffloading.PayloadS3Pointer',
+            {'s3BucketName': 'bucket', 's3Key': 'key'}
+        ])
+        self.assertEqual(parsePointer(body), ('bucket', 'key'))
+
+    def test_parse_plain_pointer(self):
+        self.assertEqual(
+            parsePointer({'s3BucketName': 'bucket', 's3Key': 'key'}),
+            ('bucket', 'key')
+        )
+
+    def test_parse_not_pointer(self):
+        self.assertIsNone(parsePointer('hello'))
+        self.assertIsNone(parsePointer('{"hello": "world"}'))
+        self.assertIsNone(parsePointer('{malformed'))
+        self.assertIsNone(parsePointer({'kinesis': {'data': 'data'}}))
+
+    def test_stream_object_ranges(self):
+        s3 = FakeS3({('bucket', 'key'): b'0123456789'})
+        chunks = list(streamObject(s3, 'bucket', 'key', chunkSize=4))
+        self.assertEqual(chunks, [b'0123', b'4567', b'89'])
+        self.assertEqual(s3.ranges, ['bytes=0-3', 'bytes=4-7', 'bytes=8-11'])
+
+    def test_stream_empty_object(self):
+        s3 = FakeS3({('bucket', 'key'): b''})
+        self.assertEqual(list(streamObject(s3, 'bucket', 'key')), [])
+
+    def test_stream_object_error(self):
+        s3 = FakeS3({})
+        s3.get_object = lambda **kwargs: (_ for _ in ()).throw(ClientError(
+            {'Error': {'Code': 'AccessDenied'}}, 'GetObject'
+        ))
+        with self.assertRaises(ClientError):
+            list(streamObject(s3, 'bucket', 'key'))
+
+    def test_stream_object_overwritten(self):
+        s3 = FakeS3({('bucket', 'key'): b'0123456789'})
+        stream = streamObject(s3, 'bucket', 'key', chunkSize=4)
+        self.assertEqual(next(stream), b'0123')
+        s3.objects[('bucket', 'key')] = b'abcdefghij'
+        with self.assertRaises(ClientError) as ctx:
+            next(stream)
+        self.assertEqual(
+            ctx.exception.response['Error']['Code'], 'PreconditionFailed'
+        )
+
+    def test_iter_lines_across_chunks(self):
+        lines = list(iterLines([b'ab', b'c\nd', b'e\n', b'f']))
+        self.assertEqual(lines, [b'abc', b'de', b'f'])
+
+    def test_parse_json_lines(self):
+        rows = list(parseJSONLines([b'{"a": 1}\n\n{"a"', b': 2}\n']))
+        self.assertEqual(rows, [{'a': 1}, {'a': 2}])
+
+    def test_parse_csv_multiline(self):
+        rows = list(parseCSV([b'id,text\n1,"hel', b'lo\nworld"\n2,test\n']))
+        self.assertEqual(rows, [
+            {'id': '1', 'text': 'hello\nworld'},
+            {'id': '2', 'text': 'test'}
+        ])
+
+    def test_expand_record_passthrough(self):
+        self.assertEqual(list(expandRecord('hello', FakeS3({}))), ['hello'])
+
+    def test_expand_records_bounded_chunks(self):
+        data = ''.join(
+            json.dumps({'id': i}) + '\n' for i in range(100)
+        ).encode('utf-8')
+        s3 = FakeS3({('bucket', 'big.jsonl'): data})
+        pointer = {'s3BucketName': 'bucket', 's3Key': 'big.jsonl'}
+
+        rows = list(expandRecords(['first', pointer], s3, chunkSize=64))
+
+        self.assertEqual(rows[0], 'first')
+        self.assertEqual([r['id'] for r in rows[1:]], list(range(100)))
+        self.assertEqual(len(s3.ranges), (len(data) + 63) // 64)
+
+    def test_expand_record_csv_inferred(self):
+        s3 = FakeS3({('bucket', 'rows.CSV'): b'a,b\n1,2\n'})
+        pointer = {'s3BucketName': 'bucket', 's3Key': 'rows.CSV'}
+        self.assertEqual(
+            list(expandRecord(pointer, s3)), [{'a': '1', 'b': '2'}]
+        )
+
+    @patch('helpers.claimCheckHelpers.getClient')
+    def test_expand_record_default_client(self, mock_client):
+        mock_client.return_value = FakeS3({('bucket', 'key'): b'{"a": 1}'})
+        pointer = {'s3BucketName': 'bucket', 's3Key': 'key'}
+        self.assertEqual(list(expandRecord(pointer)), [{'a': 1}])
+        mock_client.assert_called_once_with('s3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,6 +34,16 @@ class TestClient(unittest.TestCase):
         )
         self.assertTrue(result)
 
+    @patch('helpers.clientHelpers.protectClient', return_value='protected')
+    @patch('boto3.client', return_value=True)
+    def test_create_with_breaker(self, mock_boto, mock_protect):
+        result = createAWSClient('fakeService', {'region': 'test'}, True)
+        mock_protect.assert_called_once_with(True)
+        self.assertEqual(result, 'protected')
+
+        createAWSClient('fakeService', {'region': 'test'}, {'minCalls': 5})
+        mock_protect.assert_called_with(True, minCalls=5)
+
     @patch(
         'helpers.clientHelpers.loadEnvFile',
         return_value=({'region': 'test'})
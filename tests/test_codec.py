@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+import json
+
+from helpers import codecHelpers
+from helpers.codecHelpers import (
+    selectCodec,
+    loads,
+    dumps,
+    DecodeError,
+    LazyJSON
+)
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_loads_inputs(self):
+        for data in [
+            '{"test": [1, 2]}',
+            b'{"test": [1, 2]}',
+            bytearray(b'{"test": [1, 2]}'),
+            memoryview(b'{"test": [1, 2]}')
+        ]:
+            self.assertEqual(loads(data), {'test': [1, 2]})
+
+    def test_loads_error(self):
+        with self.assertRaises(json.decoder.JSONDecodeError):
+            loads(b'{"test": ')
+
+    def test_dumps_str(self):
+        out = dumps({'test': 'héllo', 1: True})
+        self.assertIsInstance(out, str)
+        self.assertEqual(json.loads(out), {'test': 'héllo', '1': True})
+
+    def test_dumps_pretty(self):
+        for name in codecHelpers.PREFERENCE:
+            if codecHelpers.CODECS[name][0] is None:
+                continue
+            _, _, dumpFunc = selectCodec(name)
+            out = dumpFunc({'test': [1]}, pretty=True)
+            self.assertIn('\n  "test"', out)
+            self.assertEqual(json.loads(out), {'test': [1]})
+            self.assertNotIn('\n', dumpFunc({'test': [1]}))
+
+    def test_select_preferred(self):
+        name, _, _ = selectCodec()
+        installed = [
+            n for n in codecHelpers.PREFERENCE
+            if codecHelpers.CODECS[n][0] is not None
+        ]
+        self.assertEqual(name, installed[0])
+
+    def test_select_stdlib(self):
+        name, loadFunc, dumpFunc = selectCodec('json')
+        self.assertEqual(name, 'json')
+        self.assertEqual(loadFunc(memoryview(b'[1]')), [1])
+        self.assertEqual(dumpFunc([1]), '[1]')
+        with self.assertRaises(DecodeError):
+            loadFunc('[1')
+
+    @patch.dict(codecHelpers.CODECS, {
+        'orjson': (None, None, None),
+        'ujson': (None, None, None)
+    })
+    def test_select_fallback(self):
+        name, _, _ = selectCodec('orjson')
+        self.assertEqual(name, 'json')
+        name, _, _ = selectCodec()
+        self.assertEqual(name, 'json')
+
+    def test_lazy_json(self):
+        self.assertEqual(json.loads(str(LazyJSON({'a': 1}))), {'a': 1})
+        self.assertIn('object', str(LazyJSON(object())))
+
+
+if __name__ == '__main__':
+    unittest.main()
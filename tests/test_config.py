@@ -3,7 +3,7 @@ from base64 import b64encode
 from botocore.exceptions import ClientError
 import os
 from yaml import YAMLError
-from unittest.mock import patch, mock_open, call
+from unittest.mock import patch, mock_open, call, MagicMock
 
 from helpers.configHelpers import (
     loadEnvFile,
@@ -109,6 +109,20 @@ class TestConfig(unittest.TestCase):
         outEnv = decryptEnvVar('testing')
         self.assertEqual(outEnv, 'testing')
 
+    @patch.dict(
+        os.environ,
+        {'testing': b64encode('testing'.encode('utf-8')).decode('utf-8')}
+    )
+    @patch('helpers.configHelpers.boto3')
+    def test_env_decryptor_existing_client(self, mock_boto):
+        mock_kms = MagicMock()
+        mock_kms.decrypt.return_value = {
+            'Plaintext': 'testing'.encode('utf-8')
+        }
+        outEnv = decryptEnvVar('testing', mock_kms)
+        self.assertEqual(outEnv, 'testing')
+        mock_boto.client.assert_not_called()
+
     @patch.dict(
         os.environ,
         {'testing': b64encode('testing'.encode('utf-8')).decode('utf-8')}
@@ -1,6 +1,7 @@
 import unittest
+from unittest.mock import patch
 
-from service import handler
+from service import handler, router
 from helpers.errorHelpers import NoRecordsReceived
 
 
@@ -41,6 +42,27 @@ class TestHandler(unittest.TestCase):
             pass
         self.assertRaises(NoRecordsReceived)
 
+    def test_handler_non_dict_event(self):
+        self.assertEqual(handler(['a'], None), 'Hello, World')
+        self.assertEqual(handler({'Records': ['x']}, None), 'Hello, World')
+        self.assertEqual(
+            handler({'Records': {'a': 1}}, None), 'Hello, World'
+        )
+
+    def test_handler_routed(self):
+        testRec = {
+            'Records': [
+                {
+                    'eventSource': 'aws:sqs',
+                    'body': '{"test": "hello"}'
+                }
+            ]
+        }
+        with patch.dict(router.routes, {}):
+            router.register('sqs', lambda rec, ctx: rec['test'])
+            resp = handler(testRec, None)
+        self.assertEqual(resp, ['hello'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import logging
+import time
+
+from helpers import parameterHelpers
+from helpers.parameterHelpers import ParameterStore, getParameterStore
+
+logging.disable(logging.CRITICAL)
+
+
+def stubClient():
+    client = MagicMock()
+    client.get_paginator().paginate.return_value = [
+        {'Parameters': [{'Name': '/app/test/host', 'Value': 'localhost'}]},
+        {'Parameters': [{'Name': '/app/test/db/port', 'Value': '5432'}]}
+    ]
+    client.get_parameters.return_value = {
+        'Parameters': [{'Name': '/shared/key', 'Value': 'secret'}],
+        'InvalidParameters': ['/shared/missing']
+    }
+    return client
+
+
+class TestParameters(unittest.TestCase):
+
+    def test_fetch_by_path(self):
+        client = stubClient()
+        store = ParameterStore(path='/app/test/', client=client)
+        self.assertEqual(store.fetch(), {
+            '/app/test/host': 'localhost',
+            '/app/test/db/port': '5432'
+        })
+        client.get_paginator().paginate.assert_called_once_with(
+            Path='/app/test', Recursive=True, WithDecryption=True
+        )
+        client.get_parameters.assert_not_called()
+
+    def test_fetch_names_batched(self):
+        client = stubClient()
+        names = ['/shared/{}'.format(i) for i in range(25)]
+        store = ParameterStore(names=names, client=client)
+        values = store.fetch()
+        self.assertEqual(client.get_parameters.call_count, 3)
+        client.get_parameters.assert_called_with(
+            Names=names[20:], WithDecryption=True
+        )
+        self.assertEqual(values, {'/shared/key': 'secret'})
+
+    def test_get_loads_once(self):
+        client = stubClient()
+        store = ParameterStore(path='/app/test', client=client)
+        self.assertEqual(store.get('host'), 'localhost')
+        self.assertEqual(store.get('/app/test/db/port'), '5432')
+        self.assertEqual(store.get('missing', 'default'), 'default')
+        client.get_paginator().paginate.assert_called_once()
+
+    def test_get_stale_while_revalidate(self):
+        client = stubClient()
+        store = ParameterStore(path='/app/test', client=client, ttl=60)
+        store.load()
+        store.loadedAt = time.time() - 120
+        client.get_paginator().paginate.return_value = [
+            {'Parameters': [{'Name': '/app/test/host', 'Value': 'remote'}]}
+        ]
+
+        self.assertEqual(store.get('host'), 'localhost')
+        for _ in range(100):
+            if not store.refreshing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(store.get('host'), 'remote')
+
+    def test_refresh_failure_keeps_stale(self):
+        client = stubClient()
+        store = ParameterStore(path='/app/test', client=client)
+        store.load()
+        client.get_paginator().paginate.side_effect = Exception
+        store.refreshing = True
+        store.refresh()
+        self.assertFalse(store.refreshing)
+        self.assertEqual(store.get('host'), 'localhost')
+
+    @patch('helpers.parameterHelpers.Thread')
+    def test_refresh_failure_backs_off(self, mock_thread):
+        client = stubClient()
+        store = ParameterStore(path='/app/test', client=client, ttl=60)
+        store.load()
+        store.loadedAt = time.time() - 120
+        client.get_paginator().paginate.side_effect = Exception
+        store.refresh()
+
+        store.get('host')
+        mock_thread.assert_not_called()
+
+        store.retryAt = time.time() - 1
+        store.get('host')
+        mock_thread.assert_called_once()
+
+    def test_root_path(self):
+        client = stubClient()
+        store = ParameterStore(path='/', client=client)
+        store.fetch()
+        client.get_paginator().paginate.assert_called_once_with(
+            Path='/', Recursive=True, WithDecryption=True
+        )
+        store.values = {'/host': 'localhost'}
+        store.loadedAt = time.time()
+        self.assertEqual(store.get('host'), 'localhost')
+
+    @patch('helpers.parameterHelpers.createAWSClient')
+    def test_default_client(self, mock_client):
+        mock_client.return_value = stubClient()
+        store = ParameterStore(path='/app/test')
+        store.fetch()
+        mock_client.assert_called_once_with('ssm')
+
+    def test_get_parameter_store_persistent(self):
+        store = getParameterStore(path='/app/test', ttl=10)
+        self.assertIs(getParameterStore(path='/app/test'), store)
+        self.assertEqual(store.ttl, 10)
+        del parameterHelpers.stores[('/app/test', ())]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import patch, mock_open
+import logging
+
+from scripts.localPoller import (
+    LocalQueue,
+    LocalPoller,
+    LocalContext,
+    buildRecord,
+    sourceType,
+    loadBodies
+)
+
+logging.disable(logging.CRITICAL)
+
+
+class RecordingHandler(object):
+    def __init__(self, poison=None):
+        self.batches = []
+        self.poison = poison
+
+    def __call__(self, event, context):
+        bodies = [r['body'] for r in event['Records']]
+        if self.poison in bodies:
+            raise ValueError('poison record')
+        self.batches.append(bodies)
+
+
+class TestPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.bodies = ['{{"id": {}}}'.format(i) for i in range(25)]
+
+    def test_queue_claim_partitions(self):
+        queue = LocalQueue()
+        queue.put(self.bodies, partitions=2)
+        rows = queue.claim(0, 100)
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(queue.claim(0, 100), [])
+        self.assertEqual(len(queue.claim(1, 5)), 5)
+
+    def test_batch_size(self):
+        handler = RecordingHandler()
+        poller = LocalPoller(LocalQueue(), {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 10
+        }, handler)
+        stats = poller.run(self.bodies)
+        self.assertEqual([len(b) for b in handler.batches], [10, 10, 5])
+        self.assertEqual(stats['processed'], 25)
+        self.assertEqual(stats['invocations'], 3)
+        self.assertGreater(stats['recordsPerSecond'], 0)
+        self.assertGreaterEqual(stats['maxLag'], stats['meanLag'])
+
+    def test_parallelization(self):
+        handler = RecordingHandler()
+        poller = LocalPoller(LocalQueue(), {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 100,
+            'ParallelizationFactor': 5
+        }, handler)
+        stats = poller.run(self.bodies)
+        self.assertEqual(stats['invocations'], 5)
+        self.assertEqual(stats['processed'], 25)
+
+    def test_batching_window(self):
+        handler = RecordingHandler()
+        poller = LocalPoller(LocalQueue(), {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 100,
+            'MaximumBatchingWindowInSeconds': 5
+        }, handler)
+        stats = poller.run(self.bodies[:10], rate=500)
+        self.assertEqual(stats['processed'], 10)
+        self.assertEqual(stats['invocations'], 1)
+
+    def test_bisect_on_error(self):
+        handler = RecordingHandler(poison=self.bodies[3])
+        poller = LocalPoller(LocalQueue(), {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 8,
+            'BisectBatchOnFunctionError': True,
+            'MaximumRetryAttempts': 1
+        }, handler)
+        stats = poller.run(self.bodies)
+        self.assertEqual(stats['processed'], 24)
+        self.assertEqual(stats['discarded'], 1)
+
+    def test_retry_without_bisect(self):
+        handler = RecordingHandler(poison=self.bodies[3])
+        poller = LocalPoller(LocalQueue(), {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 10,
+            'MaximumRetryAttempts': 2
+        }, handler)
+        stats = poller.run(self.bodies)
+        self.assertEqual(stats['discarded'], 10)
+        self.assertEqual(stats['errors'], 3)
+
+    def test_source_records(self):
+        self.assertEqual(sourceType({'EventSourceArn': 'source_arn'}),
+                         'kinesis')
+        row = (1, '{"a": 1}', 0)
+        self.assertEqual(
+            buildRecord('kinesis', row)['kinesis']['data'], 'eyJhIjogMX0='
+        )
+        self.assertEqual(
+            buildRecord('dynamodb', row)['dynamodb']['NewImage'], {'a': 1}
+        )
+
+    def test_context(self):
+        self.assertGreater(LocalContext(30).get_remaining_time_in_millis(), 0)
+
+    def test_load_bodies(self):
+        with patch('builtins.open', mock_open(read_data='{"a": 1}\n\n{}\n')):
+            self.assertEqual(loadBodies('test.jsonl'), ['{"a": 1}', '{}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
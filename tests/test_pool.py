@@ -0,0 +1,100 @@
+import unittest
+import logging
+import os
+
+from helpers import poolHelpers
+from helpers.poolHelpers import PipePool, getPool, availableCPUs
+from helpers.errorHelpers import PoolWorkerError
+
+logging.disable(logging.CRITICAL)
+
+
+def square(record):
+    return record * record
+
+
+def identity(record):
+    return record
+
+
+def failOnFive(record):
+    if record == 5:
+        raise ValueError('bad record')
+    return record
+
+
+def exitOnFive(record):
+    if record == 5:
+        os._exit(1)
+    return record
+
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    def test_map_ordered(self):
+        self.pool = PipePool(square, 3)
+        self.assertEqual(
+            self.pool.map(range(100), chunkSize=7),
+            [i * i for i in range(100)]
+        )
+
+    def test_map_default_chunks(self):
+        self.pool = PipePool(square, 2)
+        self.assertEqual(self.pool.map(range(10)), [i * i for i in range(10)])
+        self.assertEqual(self.pool.map([]), [])
+
+    def test_map_reuses_workers(self):
+        self.pool = PipePool(square, 2)
+        pids = [proc.pid for proc, conn in self.pool.workers]
+        self.pool.map(range(10))
+        self.pool.map(range(10))
+        self.assertEqual([proc.pid for proc, conn in self.pool.workers], pids)
+
+    def test_map_large_chunks(self):
+        # Chunks and results well beyond the pipe buffer size
+        self.pool = PipePool(identity, 1)
+        records = ['x' * 2000000] * 8
+        self.assertEqual(self.pool.map(records, chunkSize=4), records)
+
+    def test_map_error(self):
+        self.pool = PipePool(failOnFive, 2)
+        with self.assertRaises(PoolWorkerError) as err:
+            self.pool.map(range(20), chunkSize=2)
+        self.assertIn('bad record', err.exception.message)
+        # The pool is still usable after a failed map
+        self.assertEqual(self.pool.map([1, 2]), [1, 2])
+
+    def test_worker_exit_restarts(self):
+        self.pool = PipePool(exitOnFive, 2)
+        with self.assertRaises(PoolWorkerError):
+            self.pool.map(range(10), chunkSize=1)
+        self.assertEqual(len(self.pool.workers), 2)
+        self.assertEqual(self.pool.map([1, 2]), [1, 2])
+
+    def test_send_error_restarts(self):
+        self.pool = PipePool(identity, 2)
+        with self.assertRaises(Exception):
+            self.pool.map([1, lambda: 3], chunkSize=1)
+        self.assertEqual(len(self.pool.workers), 2)
+        # No results from the failed call are returned by later calls
+        self.assertEqual(self.pool.map([10, 20], chunkSize=1), [10, 20])
+        self.assertEqual(self.pool.map([30, 40], chunkSize=1), [30, 40])
+
+    def test_get_pool_persistent(self):
+        self.pool = getPool(square, 1)
+        self.assertIs(getPool(square), self.pool)
+        del poolHelpers.pools[square]
+
+    def test_available_cpus(self):
+        self.assertGreaterEqual(availableCPUs(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import time
+
+from helpers import prewarmHelpers
+from helpers.prewarmHelpers import (
+    prewarm,
+    parseClientSpec,
+    warmClient,
+    getClient,
+    getSecret
+)
+
+
+class TestPrewarm(unittest.TestCase):
+
+    def setUp(self):
+        prewarmHelpers.warmed['config'] = {}
+        prewarmHelpers.warmed['clients'] = {}
+        prewarmHelpers.warmed['secrets'] = {}
+
+    @patch('helpers.prewarmHelpers.createAWSClient')
+    def test_prewarm_not_configured(self, mock_client):
+        result = prewarm({'region': 'test'})
+        mock_client.assert_not_called()
+        self.assertEqual(result['config'], {'region': 'test'})
+
+    @patch('helpers.prewarmHelpers.loadEnvVars', return_value={})
+    def test_prewarm_load_config(self, mock_env):
+        prewarm()
+        mock_env.assert_called_once()
+
+    @patch('helpers.prewarmHelpers.decryptEnvVar', return_value='secret')
+    @patch('helpers.prewarmHelpers.createAWSClient')
+    def test_prewarm_clients_secrets(self, mock_client, mock_decrypt):
+        result = prewarm({
+            'region': 'test',
+            'prewarm': {
+                'clients': [
+                    's3',
+                    {'service': 'sqs', 'operation': 'list_queues'}
+                ],
+                'secrets': ['DB_PASSWORD']
+            }
+        })
+        self.assertEqual(
+            set(result['clients'].keys()), set(['s3', 'sqs', 'kms'])
+        )
+        mock_client().list_queues.assert_called_once_with()
+        mock_decrypt.assert_called_once_with(
+            'DB_PASSWORD', result['clients']['kms']
+        )
+        self.assertEqual(result['secrets']['DB_PASSWORD'], 'secret')
+
+    @patch('helpers.prewarmHelpers.decryptEnvVar')
+    @patch('helpers.prewarmHelpers.createAWSClient', side_effect=KeyError)
+    def test_prewarm_kms_client_error(self, mock_client, mock_decrypt):
+        result = prewarm({
+            'prewarm': {'secrets': ['DB_PASSWORD']}
+        })
+        mock_decrypt.assert_not_called()
+        self.assertEqual(result['secrets'], {})
+
+    @patch('helpers.prewarmHelpers.getParameterStore')
+    @patch('helpers.prewarmHelpers.createAWSClient')
+    def test_prewarm_parameters(self, mock_client, mock_store):
+        mock_store().client = None
+        prewarm({
+            'region': 'test',
+            'prewarm': {'parameters': {'path': '/app/test', 'ttl': 60}}
+        })
+        mock_store.assert_called_with(path='/app/test', ttl=60)
+        mock_store().load.assert_called_once()
+        self.assertIs(mock_store().client, mock_client())
+
+    @patch('helpers.prewarmHelpers.createAWSClient')
+    def test_prewarm_budget_exceeded(self, mock_client):
+        mock_client().slow_call.side_effect = lambda: time.sleep(0.5)
+        start = time.time()
+        prewarm({
+            'region': 'test',
+            'prewarm': {
+                'timeout': 0.05,
+                'clients': [{'service': 's3', 'operation': 'slow_call'}]
+            }
+        })
+        self.assertLess(time.time() - start, 0.4)
+
+    def test_parse_client_spec(self):
+        self.assertEqual(parseClientSpec('s3'), ('s3', None, {}, None))
+        self.assertEqual(
+            parseClientSpec({
+                'service': 's3',
+                'operation': 'list_buckets',
+                'params': {'test': 1},
+                'breaker': {'minCalls': 5}
+            }),
+            ('s3', 'list_buckets', {'test': 1}, {'minCalls': 5})
+        )
+
+    @patch('helpers.prewarmHelpers.createAWSClient')
+    def test_warm_client_operation_error(self, mock_client):
+        mock_client().list_buckets.side_effect = Exception
+        warmClient('s3', 'list_buckets', {})
+        self.assertIn('s3', prewarmHelpers.warmed['clients'])
+
+    @patch('helpers.prewarmHelpers.createAWSClient', return_value=MagicMock())
+    def test_get_client_cached(self, mock_client):
+        first = getClient('s3', {'region': 'test'})
+        second = getClient('s3')
+        mock_client.assert_called_once_with(
+            's3', {'region': 'test'}, breaker=None
+        )
+        self.assertIs(first, second)
+
+    @patch('helpers.prewarmHelpers.decryptEnvVar', return_value='secret')
+    def test_get_secret_cached(self, mock_decrypt):
+        getSecret('DB_PASSWORD')
+        self.assertEqual(getSecret('DB_PASSWORD'), 'secret')
+        mock_decrypt.assert_called_once_with('DB_PASSWORD')
+
+
+if __name__ == '__main__':
+    unittest.main()
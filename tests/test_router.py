@@ -0,0 +1,163 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from base64 import b64encode
+import json
+
+from helpers.routerHelpers import classifyEvent, decodeBody, EventRouter
+from helpers.errorHelpers import UnroutableEvent
+
+
+def kinesisRecord(body):
+    return {
+        'eventSource': 'aws:kinesis',
+        'kinesis': {
+            'data': b64encode(json.dumps(body).encode('utf-8')).decode('utf-8')
+        }
+    }
+
+
+class TestRouter(unittest.TestCase):
+
+    def test_classify_record_sources(self):
+        self.assertEqual(
+            classifyEvent({'Records': [kinesisRecord({})]}), 'kinesis'
+        )
+        self.assertEqual(
+            classifyEvent({'Records': [{'eventSource': 'aws:sqs'}]}), 'sqs'
+        )
+        self.assertEqual(
+            classifyEvent({'Records': [{'EventSource': 'aws:sns'}]}), 'sns'
+        )
+        self.assertEqual(
+            classifyEvent({'Records': [{'eventSource': 'aws:s3'}]}), 's3'
+        )
+        self.assertEqual(
+            classifyEvent({'Records': [{'eventSource': 'aws:dynamodb'}]}),
+            'dynamodb'
+        )
+
+    def test_classify_other_sources(self):
+        self.assertEqual(
+            classifyEvent({'httpMethod': 'GET', 'path': '/'}), 'apigateway'
+        )
+        self.assertEqual(
+            classifyEvent({'routeKey': 'GET /', 'rawPath': '/'}), 'apigateway'
+        )
+        self.assertEqual(
+            classifyEvent({
+                'source': 'aws.events',
+                'detail-type': 'Scheduled Event'
+            }),
+            'scheduled'
+        )
+
+    def test_classify_unknown(self):
+        self.assertIsNone(classifyEvent({'source': 'Kinesis', 'Records': []}))
+        self.assertIsNone(classifyEvent({'Records': [{'kinesis': {}}]}))
+
+    def test_classify_non_dict(self):
+        self.assertIsNone(classifyEvent(['a']))
+        self.assertIsNone(classifyEvent('test'))
+        self.assertIsNone(classifyEvent({'Records': ['x']}))
+        self.assertIsNone(classifyEvent({'Records': {'a': 1}}))
+
+    def test_dispatch_per_record(self):
+        router = EventRouter()
+        mock_func = MagicMock(side_effect=lambda rec, ctx: rec['id'])
+        router.register('kinesis', mock_func)
+        results = router.dispatch({'Records': [
+            kinesisRecord({'id': 1}), kinesisRecord({'id': 2})
+        ]}, 'context')
+        self.assertEqual(results, [1, 2])
+        mock_func.assert_called_with({'id': 2}, 'context')
+
+    def test_dispatch_batches(self):
+        router = EventRouter()
+        mock_func = MagicMock(side_effect=lambda recs, ctx: len(recs))
+        router.register('sqs', mock_func, batchSize=2)
+        event = {'Records': [
+            {'eventSource': 'aws:sqs', 'body': str(i)} for i in range(5)
+        ]}
+        self.assertEqual(router.dispatch(event, None), [2, 2, 1])
+        mock_func.assert_any_call([0, 1], None)
+
+    def test_dispatch_whole_batch_raw(self):
+        router = EventRouter()
+
+        @router.route('sqs', batchSize=None, decoder='raw')
+        def handleAll(records, context):
+            return [r['body'] for r in records]
+
+        event = {'Records': [
+            {'eventSource': 'aws:sqs', 'body': 'not json'}
+        ]}
+        self.assertEqual(router.dispatch(event, None), [['not json']])
+
+    def test_dispatch_custom_decoder(self):
+        router = EventRouter()
+        router.register(
+            'sns', lambda rec, ctx: rec, decoder=lambda r: r['Sns']['Subject']
+        )
+        event = {'Records': [{'EventSource': 'aws:sns', 'Sns': {
+            'Subject': 'test', 'Message': 'test'
+        }}]}
+        self.assertEqual(router.dispatch(event, None), ['test'])
+
+    def test_dispatch_api_gateway(self):
+        router = EventRouter()
+        router.register('apigateway', lambda event, ctx: {
+            'statusCode': 200,
+            'body': event['path']
+        })
+        event = {'httpMethod': 'GET', 'path': '/test'}
+        self.assertEqual(
+            router.dispatch(event, None), {'statusCode': 200, 'body': '/test'}
+        )
+
+    def test_decode_body_json(self):
+        event = {
+            'httpMethod': 'POST',
+            'headers': {'Content-Type': 'application/json'},
+            'isBase64Encoded': True,
+            'body': b64encode(b'{"test": true}').decode('utf-8')
+        }
+        self.assertEqual(decodeBody(event), {'test': True})
+
+    def test_decode_body_form(self):
+        event = {
+            'httpMethod': 'POST',
+            'headers': {'content-type': 'application/x-www-form-urlencoded'},
+            'body': 'test=1&other=2'
+        }
+        self.assertEqual(decodeBody(event), 'test=1&other=2')
+        self.assertIsNone(decodeBody({'httpMethod': 'GET'}))
+
+    @patch('helpers.routerHelpers.expandRecords')
+    def test_dispatch_claim_check(self, mock_expand):
+        mock_expand.return_value = iter([{'row': 1}, {'row': 2}])
+        router = EventRouter()
+        router.register('sqs', lambda rec, ctx: rec, claimCheck=True)
+        event = {'Records': [{'eventSource': 'aws:sqs', 'body': '{}'}]}
+        self.assertEqual(
+            router.dispatch(event, None), [{'row': 1}, {'row': 2}]
+        )
+
+    def test_dispatch_no_route(self):
+        router = EventRouter()
+        with self.assertRaises(UnroutableEvent):
+            router.dispatch({'Records': [{'eventSource': 'aws:sqs'}]}, None)
+
+    def test_register_unknown_source(self):
+        router = EventRouter()
+        with self.assertRaises(ValueError):
+            router.register('kafka', lambda rec, ctx: rec)
+
+    def test_register_invalid_batch_size(self):
+        router = EventRouter()
+        for batchSize in [0, -1, 1.5]:
+            with self.assertRaises(ValueError):
+                router.register('sqs', lambda rec, ctx: rec, batchSize)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,14 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+from base64 import b64encode
+from hashlib import sha256
+from importlib.util import cache_from_source
+from io import BytesIO
 import logging
+import os
 import sys
+import tempfile
+from zipfile import ZipFile, ZipInfo
 
 from scripts.lambdaRun import (
     main,
@@ -9,9 +16,13 @@ from scripts.lambdaRun import (
     buildFunc,
     runFunc,
     errFunc,
-    runProcess
+    runProcess,
+    buildArtifact,
+    normalizeArtifact,
+    diffFunctionConfig,
+    expandEnvValue
 )
-from helpers.errorHelpers import InvalidExecutionType
+from helpers.errorHelpers import InvalidExecutionType, BuildFailed
 
 # Disable logging while we are running tests
 logging.disable(logging.CRITICAL)
@@ -43,13 +54,225 @@ class TestScripts(unittest.TestCase):
         mock_err.assert_called_once_with('bad_function')
         mock_remove.assert_called_once_with('run_config.yaml')
 
+    mockConfig = {
+        'function_name': 'tester',
+        'handler': 'service.handler',
+        'runtime': 'python3.7',
+        'description': None,
+        'role': 'lambda_role',
+        'timeout': 30,
+        'memory_size': 128,
+        'environment_variables': {'LOG_LEVEL': 'info'}
+    }
+
+    mockDeployed = {
+        'Handler': 'service.handler',
+        'Runtime': 'python3.7',
+        'Description': '',
+        'Timeout': 30,
+        'MemorySize': 128,
+        'Role': 'arn:aws:iam::000000000000:role/lambda_role',
+        'Environment': {'Variables': {'LOG_LEVEL': 'info'}},
+        'CodeSha256': b64encode(sha256(b'code').digest()).decode('utf-8')
+    }
+
+    def mockLambdaClient(self, deployed):
+        client = MagicMock()
+        client.exceptions.ResourceNotFoundException = type(
+            'ResourceNotFoundException', (Exception,), {}
+        )
+        if deployed is None:
+            client.get_function_configuration.side_effect = \
+                client.exceptions.ResourceNotFoundException
+        else:
+            client.get_function_configuration.return_value = deployed
+        return client
+
     @patch('scripts.lambdaRun.runProcess')
     @patch('scripts.lambdaRun.createEventMapping')
-    def test_deploy_function(self, mock_create, mock_run):
+    @patch('scripts.lambdaRun.loadEnvVars', return_value=mockConfig)
+    @patch('scripts.lambdaRun.createAWSClient')
+    def test_deploy_function(self, mock_client, mock_env, mock_create,
+                             mock_run):
+        mock_client.return_value = self.mockLambdaClient(None)
         deployFunc('test')
         mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args[0][1][0], 'deploy')
+        mock_create.assert_called_once_with('test')
+
+    @patch.dict(os.environ, {'FORCE_DEPLOY': 'true'})
+    @patch('scripts.lambdaRun.runProcess')
+    @patch('scripts.lambdaRun.createEventMapping')
+    @patch('scripts.lambdaRun.loadEnvVars', return_value=mockConfig)
+    @patch('scripts.lambdaRun.createAWSClient')
+    def test_deploy_forced(self, mock_client, mock_env, mock_create,
+                           mock_run):
+        mock_client.return_value = self.mockLambdaClient(self.mockDeployed)
+        deployFunc('test')
+        mock_client().get_function_configuration.assert_not_called()
+        self.assertEqual(mock_run.call_args[0][1][0], 'deploy')
+
+    @patch('scripts.lambdaRun.normalizeArtifact', return_value=b'code')
+    @patch('scripts.lambdaRun.buildArtifact')
+    @patch('scripts.lambdaRun.createEventMapping')
+    @patch('scripts.lambdaRun.loadEnvVars', return_value=mockConfig)
+    @patch('scripts.lambdaRun.createAWSClient')
+    def test_deploy_unchanged(self, mock_client, mock_env, mock_create,
+                              mock_build, mock_normalize):
+        client = self.mockLambdaClient(self.mockDeployed)
+        mock_client.return_value = client
+        deployFunc('test')
+        client.get_function_configuration.assert_called_once_with(
+            FunctionName='tester'
+        )
+        client.update_function_code.assert_not_called()
+        client.update_function_configuration.assert_not_called()
         mock_create.assert_called_once_with('test')
 
+    @patch('scripts.lambdaRun.normalizeArtifact', return_value=b'new code')
+    @patch('scripts.lambdaRun.buildArtifact')
+    @patch('scripts.lambdaRun.createEventMapping')
+    @patch('scripts.lambdaRun.loadEnvVars', return_value=mockConfig)
+    @patch('scripts.lambdaRun.createAWSClient')
+    def test_deploy_code_changed(self, mock_client, mock_env, mock_create,
+                                 mock_build, mock_normalize):
+        client = self.mockLambdaClient(self.mockDeployed)
+        mock_client.return_value = client
+        deployFunc('test')
+        client.update_function_code.assert_called_once_with(
+            FunctionName='tester', ZipFile=b'new code', Publish=True
+        )
+        client.update_function_configuration.assert_not_called()
+
+    @patch('scripts.lambdaRun.normalizeArtifact', return_value=b'code')
+    @patch('scripts.lambdaRun.buildArtifact')
+    @patch('scripts.lambdaRun.createEventMapping')
+    @patch('scripts.lambdaRun.loadEnvVars')
+    @patch('scripts.lambdaRun.createAWSClient')
+    def test_deploy_config_changed(self, mock_client, mock_env, mock_create,
+                                   mock_build, mock_normalize):
+        mock_env.return_value = {**self.mockConfig, 'memory_size': 1024}
+        client = self.mockLambdaClient(self.mockDeployed)
+        mock_client.return_value = client
+        deployFunc('test')
+        client.update_function_code.assert_not_called()
+        client.update_function_configuration.assert_called_once_with(
+            FunctionName='tester', MemorySize=1024
+        )
+
+    def test_diff_config(self):
+        self.assertEqual(
+            diffFunctionConfig(self.mockConfig, self.mockDeployed), {}
+        )
+        update = diffFunctionConfig({
+            **self.mockConfig,
+            'role': 'other_role',
+            'subnet_ids': ['b', 'a'],
+            'environment_variables': {'LOG_LEVEL': 'debug'}
+        }, {
+            **self.mockDeployed,
+            'VpcConfig': {'SubnetIds': ['a'], 'SecurityGroupIds': []}
+        })
+        self.assertEqual(
+            update['Role'], 'arn:aws:iam::000000000000:role/other_role'
+        )
+        self.assertEqual(update['VpcConfig']['SubnetIds'], ['b', 'a'])
+        self.assertEqual(
+            update['Environment'], {'Variables': {'LOG_LEVEL': 'debug'}}
+        )
+
+    @patch.dict(os.environ, {'DEPLOY_SECRET': 'secret'})
+    def test_expand_env_value(self):
+        self.assertEqual(expandEnvValue('${DEPLOY_SECRET}'), 'secret')
+        self.assertEqual(expandEnvValue('plain'), 'plain')
+        self.assertEqual(expandEnvValue(30), 30)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'Requires hash based pyc')
+    def test_normalize_artifact(self):
+        def buildZip(path, dateTime):
+            with ZipFile(path, 'w') as out:
+                for name in ['service.py', 'helpers/', 'a/b.pyc', 'a/b.py']:
+                    out.writestr(ZipInfo(name, date_time=dateTime), name)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, 'first.zip')
+            second = os.path.join(tmp, 'second.zip')
+            buildZip(first, (2019, 1, 1, 0, 0, 0))
+            buildZip(second, (2020, 6, 1, 12, 0, 0))
+
+            normalized = normalizeArtifact(first)
+            self.assertEqual(normalized, normalizeArtifact(second))
+
+            package = ZipFile(BytesIO(normalized))
+            bytecode = cache_from_source('a/b.py')
+            self.assertEqual(sorted(package.namelist()), sorted([
+                cache_from_source('service.py'),
+                bytecode,
+                'a/b.py',
+                'service.py'
+            ]))
+            # Flags in the header mark the .pyc as unchecked hash based
+            flags = int.from_bytes(package.read(bytecode)[4:8], 'little')
+            self.assertEqual(flags, 0b01)
+
+    @patch('scripts.lambdaRun.HASH_PYC', False)
+    def test_normalize_artifact_without_bytecode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'package.zip')
+            with ZipFile(path, 'w') as out:
+                out.writestr('service.py', 'pass')
+                out.writestr('__pycache__/service.cpython-36.pyc', 'pyc')
+            self.assertEqual(
+                ZipFile(BytesIO(normalizeArtifact(path))).namelist(),
+                ['service.py']
+            )
+
+    def test_normalize_artifact_uncompilable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'package.zip')
+            with ZipFile(path, 'w') as out:
+                out.writestr('legacy.py', 'print "python 2"')
+            self.assertEqual(
+                ZipFile(BytesIO(normalizeArtifact(path))).namelist(),
+                ['legacy.py']
+            )
+
+    def buildInto(self, distDir, names, returncode=0):
+        def build(runType, argList):
+            for name in names:
+                with open(os.path.join(distDir, name), 'w') as out:
+                    out.write(name)
+            return MagicMock(returncode=returncode)
+        return build
+
+    @patch('scripts.lambdaRun.runProcess')
+    def test_build_artifact(self, mock_run):
+        with tempfile.TemporaryDirectory() as tmp:
+            old = os.path.join(tmp, 'old.zip')
+            with open(old, 'w') as out:
+                out.write('old')
+            os.utime(old, (1, 1))
+            mock_run.side_effect = self.buildInto(tmp, ['new.zip'])
+            path = buildArtifact('test', {'dist_directory': tmp})
+        self.assertEqual(mock_run.call_args[0][1][0], 'build')
+        self.assertEqual(path, os.path.join(tmp, 'new.zip'))
+
+    @patch('scripts.lambdaRun.runProcess')
+    def test_build_artifact_failed(self, mock_run):
+        with tempfile.TemporaryDirectory() as tmp:
+            mock_run.side_effect = self.buildInto(tmp, ['new.zip'], 1)
+            with self.assertRaises(BuildFailed):
+                buildArtifact('test', {'dist_directory': tmp})
+
+    @patch('scripts.lambdaRun.runProcess')
+    def test_build_artifact_no_package(self, mock_run):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'old.zip'), 'w') as out:
+                out.write('old')
+            mock_run.side_effect = self.buildInto(tmp, [])
+            with self.assertRaises(BuildFailed):
+                buildArtifact('test', {'dist_directory': tmp})
+
     @patch('scripts.lambdaRun.runProcess')
     def test_build_function(self, mock_run):
         buildFunc('test')
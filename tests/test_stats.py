@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import logging
+import os
+import tempfile
+
+from helpers import statsHelpers
+from helpers.statsHelpers import (
+    iteratorAge,
+    recordInvocation,
+    trimStats,
+    loadStats,
+    loadLoggedStats,
+    recordStats,
+    statsFile
+)
+
+logging.disable(logging.CRITICAL)
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'stats.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iterator_age(self):
+        event = {'Records': [
+            {'kinesis': {'approximateArrivalTimestamp': 90.0}},
+            {'dynamodb': {'ApproximateCreationDateTime': 95}},
+            {'attributes': {'SentTimestamp': '80000'}},
+            {'s3': {}}
+        ]}
+        self.assertEqual(iteratorAge(event, 100.0), 20000)
+        self.assertIsNone(iteratorAge({'Records': [{'s3': {}}]}, 100.0))
+        self.assertIsNone(iteratorAge({}, 100.0))
+
+    def test_record_and_load(self):
+        recordInvocation({'batchSize': 1, 'env': 'qa'}, self.path)
+        recordInvocation({'batchSize': 2, 'env': 'production'}, self.path)
+        recordInvocation({'batchSize': 3}, self.path)
+        self.assertEqual(len(loadStats(self.path)), 3)
+        self.assertEqual(
+            [s['batchSize'] for s in loadStats(self.path, 'qa')], [1, 3]
+        )
+
+    @patch('builtins.print')
+    def test_record_logged_in_lambda(self, mock_print):
+        with patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_NAME': 'test'}):
+            os.environ.pop('STATS_FILE', None)
+            self.assertIsNone(statsFile())
+            recordInvocation({'batchSize': 1})
+        self.assertEqual(
+            json.loads(mock_print.call_args[0][0]),
+            {'invocationStats': {'batchSize': 1}}
+        )
+
+    def test_load_logged(self):
+        client = MagicMock()
+        client.get_paginator().paginate.return_value = [{'events': [
+            {'message': '{"invocationStats": {"timestamp": 2, "env": "qa"}}'},
+            {'message': 'START RequestId: 1234'},
+            {'message': '{"invocationStats": {"timestamp": 1, "env": "qa"}}'},
+            {'message': '{"invocationStats": {"timestamp": 3, "env": "dev"}}'}
+        ]}]
+        stats = loadLoggedStats('test', 1, env='qa', client=client)
+        self.assertEqual([s['timestamp'] for s in stats], [1, 2])
+        kwargs = client.get_paginator().paginate.call_args[1]
+        self.assertEqual(kwargs['logGroupName'], '/aws/lambda/test')
+
+    def test_load_missing(self):
+        self.assertEqual(loadStats(self.path), [])
+
+    def test_trim(self):
+        for i in range(10):
+            recordInvocation({'batchSize': i}, self.path)
+        trimStats(self.path, maxEntries=4)
+        self.assertEqual(
+            [s['batchSize'] for s in loadStats(self.path)], [6, 7, 8, 9]
+        )
+
+    @patch.object(statsHelpers, 'TRIM_INTERVAL', 2)
+    @patch.object(statsHelpers, 'trimStats')
+    def test_trim_interval(self, mock_trim):
+        statsHelpers.state['writes'] = 0
+        recordInvocation({}, self.path)
+        mock_trim.assert_not_called()
+        recordInvocation({}, self.path)
+        mock_trim.assert_called_once_with(self.path)
+
+    def test_record_stats_disabled(self):
+        def handler(event, context):
+            return True
+        self.assertIs(recordStats(handler), handler)
+
+    def test_record_stats(self):
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 1000
+
+        with patch.dict(os.environ, {
+            'RECORD_STATS': 'true', 'STATS_FILE': self.path
+        }):
+            @recordStats
+            def handler(event, context):
+                if event['Records'][0]['body'] == 'fail':
+                    raise ValueError
+                return 'done'
+
+            event = {'Records': [{
+                'eventSource': 'aws:sqs',
+                'eventSourceARN': 'arn:aws:sqs:test',
+                'body': 'ok'
+            }]}
+            self.assertEqual(handler(event, context), 'done')
+            with self.assertRaises(ValueError):
+                handler({'Records': [{'body': 'fail'}]}, None)
+
+        with open(self.path) as store:
+            stats = [json.loads(line) for line in store]
+        self.assertEqual(stats[0]['source'], 'sqs')
+        self.assertEqual(stats[0]['sourceArn'], 'arn:aws:sqs:test')
+        self.assertEqual(stats[0]['batchSize'], 1)
+        self.assertFalse(stats[0]['failed'])
+        self.assertGreaterEqual(stats[0]['timeout'], 1000)
+        self.assertTrue(stats[1]['failed'])
+        self.assertNotIn('timeout', stats[1])
+
+    def test_record_stats_non_dict_event(self):
+        with patch.dict(os.environ, {
+            'RECORD_STATS': 'true', 'STATS_FILE': self.path
+        }):
+            @recordStats
+            def handler(event, context):
+                return 'done'
+
+            self.assertEqual(handler(['a'], None), 'done')
+            # Errors collecting stats never replace the handler's result
+            self.assertEqual(
+                handler({'Records': [{'kinesis': 'abc'}]}, None), 'done'
+            )
+
+        self.assertEqual(loadStats(self.path)[0]['batchSize'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch, mock_open
+import json
+import logging
+
+from scripts.tuneMappings import (
+    fitModel,
+    recommend,
+    arrivalRate,
+    sourceStats,
+    writeRecommendations
+)
+
+logging.disable(logging.CRITICAL)
+
+
+def invocation(batchSize, duration, timestamp=0, failed=False, age=None,
+               source='kinesis'):
+    return {
+        'timestamp': timestamp,
+        'source': source,
+        'batchSize': batchSize,
+        'duration': duration,
+        'failed': failed,
+        'iteratorAge': age
+    }
+
+
+class TestTune(unittest.TestCase):
+
+    def test_fit_model(self):
+        stats = [invocation(n, 100 + 2 * n) for n in [10, 50, 100]]
+        overhead, perRecord = fitModel(stats)
+        self.assertAlmostEqual(overhead, 100)
+        self.assertAlmostEqual(perRecord, 2)
+
+    def test_fit_model_single_size(self):
+        self.assertEqual(fitModel([invocation(10, 50)]), (0.0, 5.0))
+
+    def test_fit_model_no_data(self):
+        self.assertIsNone(fitModel([invocation(10, 50, failed=True)]))
+
+    def test_arrival_rate(self):
+        self.assertEqual(
+            arrivalRate([invocation(10, 1, 0), invocation(10, 1, 10)]), 2
+        )
+        self.assertIsNone(arrivalRate([invocation(10, 1, 0)]))
+
+    def test_recommend_batch_size(self):
+        stats = [
+            invocation(n, 100 + 2 * n, timestamp=i)
+            for i, n in enumerate([100, 100, 50, 100])
+        ]
+        result = recommend(stats, {
+            'EventSourceArn': 'arn:aws:kinesis:test',
+            'BatchSize': 100
+        }, timeout=30000)
+        # (30000 * 0.5 - 100) / 2
+        self.assertEqual(result['recommended']['BatchSize'], 7450)
+        self.assertEqual(
+            result['recommended']['MaximumBatchingWindowInSeconds'], 0
+        )
+        self.assertEqual(result['recommended']['ParallelizationFactor'], 1)
+
+    def test_recommend_failures_and_lag(self):
+        stats = [
+            invocation(100, 1000, timestamp=i, age=120000)
+            for i in range(10)
+        ]
+        stats[0]['failed'] = True
+        result = recommend(stats, {
+            'EventSourceArn': 'arn:aws:kinesis:test',
+            'BatchSize': 100,
+            'ParallelizationFactor': 2
+        }, timeout=3000)
+        recommended = result['recommended']
+        self.assertEqual(recommended['BatchSize'], 75)
+        self.assertTrue(recommended['BisectBatchOnFunctionError'])
+        self.assertEqual(recommended['ParallelizationFactor'], 3)
+
+    def test_recommend_window_for_sparse_sqs(self):
+        stats = [
+            invocation(2, 10 + n, timestamp=i * 10, source='sqs')
+            for i, n in enumerate([1, 2, 1, 2])
+        ]
+        result = recommend(stats, {
+            'EventSourceArn': 'arn:aws:sqs:test',
+            'BatchSize': 100
+        }, timeout=30000, maxLatency=60000)
+        recommended = result['recommended']
+        # The 60s latency bound less the ~15s predicted batch duration
+        self.assertEqual(recommended['MaximumBatchingWindowInSeconds'], 45)
+        self.assertNotIn('ParallelizationFactor', recommended)
+
+    def test_recommend_no_data(self):
+        result = recommend([], {'EventSourceArn': 'test'}, timeout=30000)
+        self.assertEqual(result['recommended'], {})
+
+    def test_source_stats(self):
+        stats = [
+            invocation(1, 1, source='sqs'),
+            invocation(1, 1, source='kinesis'),
+            invocation(1, 1, source=None)
+        ]
+        self.assertEqual(
+            len(sourceStats(stats, {'EventSourceArn': 'arn:aws:sqs:x'})), 2
+        )
+
+    def test_source_stats_by_arn(self):
+        first = invocation(1, 1, source='sqs')
+        first['sourceArn'] = 'arn:aws:sqs:a'
+        second = invocation(1, 1, source='sqs')
+        second['sourceArn'] = 'arn:aws:sqs:b'
+        legacy = invocation(1, 1, source='sqs')
+        self.assertEqual(
+            sourceStats(
+                [first, second, legacy], {'EventSourceArn': 'arn:aws:sqs:a'}
+            ),
+            [first, legacy]
+        )
+
+    def test_write_recommendations(self):
+        jsonD = json.dumps({'EventSourceMappings': [
+            {'EventSourceArn': 'a', 'BatchSize': 100, 'Enabled': True},
+            {'EventSourceArn': 'b', 'BatchSize': 100}
+        ]})
+        m = mock_open(read_data=jsonD)
+        with patch('builtins.open', m, create=True):
+            writeRecommendations('development', [
+                {'EventSourceArn': 'a', 'recommended': {'BatchSize': 500}}
+            ])
+
+        written = json.loads(''.join(
+            call[0][0] for call in m().write.call_args_list
+        ))
+        self.assertEqual(written['EventSourceMappings'][0], {
+            'EventSourceArn': 'a', 'BatchSize': 500, 'Enabled': True
+        })
+        self.assertEqual(written['EventSourceMappings'][1]['BatchSize'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()